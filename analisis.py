@@ -0,0 +1,113 @@
+import threading
+
+import numpy as np
+
+from sintesis import SAMPLE_RATE
+
+# --- Configuración del análisis espectral ---
+TAMANO_VENTANA = 16384 # ~0,37 s a 44,1 kHz: resolución de ~2,7 Hz, útil para tonos graves
+SALTO = 1024 # muestras entre dos columnas del espectrograma (~23 ms)
+COLUMNAS_ESPECTROGRAMA = 200
+FRECUENCIA_MAX = 1000 # Hz que se muestran
+DB_MIN = -100.0
+
+
+class AnalizadorEspectral:
+    """
+    STFT incremental sobre un búfer circular de tamaño fijo.
+
+    `agregar` solo copia las muestras nuevas en el anillo (se puede llamar desde
+    el callback de audio). `procesar` calcula una FFT completa de la ventana por
+    cada `salto` muestras nuevas: O(ventana · log ventana) por columna, sin
+    recalcular las anteriores. La ventana, el marco y la salida de la FFT se
+    reservan una vez y se reutilizan en todas las columnas.
+    El espectrograma se desplaza en su propio array, que se puede pasar tal
+    cual a `AxesImage.set_data`.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, tamano_ventana=TAMANO_VENTANA, salto=SALTO,
+                 columnas=COLUMNAS_ESPECTROGRAMA, frecuencia_max=FRECUENCIA_MAX):
+        self.sample_rate = sample_rate
+        self.tamano_ventana = tamano_ventana
+        self.salto = salto
+
+        self.anillo = np.zeros(4 * tamano_ventana, dtype=np.float32)
+        self.total = 0 # muestras escritas desde el principio
+        self.siguiente = tamano_ventana # muestra en la que termina la próxima ventana
+
+        self.ventana = np.hanning(tamano_ventana)
+        # Escala para que un seno de amplitud 1 marque 0 dB
+        self.escala = 2 / self.ventana.sum()
+        frecuencias = np.fft.rfftfreq(tamano_ventana, 1 / sample_rate)
+        self.n_bins = int(np.searchsorted(frecuencias, min(frecuencia_max, sample_rate / 2), side="right"))
+        self.frecuencias = frecuencias[:self.n_bins]
+
+        # En float64: la rfft de NumPy es más rápida así que en float32 y escribe en `out`
+        self._marco = np.empty(tamano_ventana, dtype=np.float64)
+        self._transformada = np.empty(tamano_ventana // 2 + 1, dtype=np.complex128)
+        self._magnitud = np.empty(self.n_bins, dtype=np.float64)
+        self.espectro = np.full(self.n_bins, DB_MIN, dtype=np.float32)
+        self.espectrograma = np.full((self.n_bins, columnas), DB_MIN, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def agregar(self, bloque):
+        """Copia `bloque` en el anillo. No asigna memoria."""
+        n = bloque.shape[0]
+        tamano = self.anillo.size
+        if n > tamano:
+            bloque = bloque[-tamano:]
+            n = tamano
+        with self._lock:
+            inicio = self.total % tamano
+            primera = min(n, tamano - inicio)
+            self.anillo[inicio:inicio + primera] = bloque[:primera]
+            self.anillo[:n - primera] = bloque[primera:]
+            self.total += n
+
+    def _copiar_marco(self, fin):
+        """Copia en `_marco` las tamano_ventana muestras que terminan en `fin` (con el cerrojo tomado)."""
+        tamano = self.anillo.size
+        inicio = (fin - self.tamano_ventana) % tamano
+        primera = min(self.tamano_ventana, tamano - inicio)
+        self._marco[:primera] = self.anillo[inicio:inicio + primera]
+        self._marco[primera:] = self.anillo[:self.tamano_ventana - primera]
+
+    def procesar(self):
+        """Calcula las columnas pendientes. Devuelve cuántas se han añadido."""
+        nuevas = 0
+        while True:
+            with self._lock:
+                # Si nos hemos quedado atrás más de lo que guarda el anillo, saltamos al presente
+                if self.total - self.siguiente > self.anillo.size - self.tamano_ventana:
+                    self.siguiente = self.total - (self.total - self.tamano_ventana) % self.salto
+                if self.siguiente > self.total:
+                    break
+                self._copiar_marco(self.siguiente)
+                self.siguiente += self.salto
+
+            np.multiply(self._marco, self.ventana, out=self._marco)
+            np.fft.rfft(self._marco, out=self._transformada)
+            np.abs(self._transformada[:self.n_bins], out=self._magnitud)
+            np.multiply(self._magnitud, self.escala, out=self._magnitud)
+            np.maximum(self._magnitud, 10 ** (DB_MIN / 20), out=self._magnitud)
+            np.log10(self._magnitud, out=self._magnitud)
+            np.multiply(self._magnitud, 20, out=self.espectro, casting="same_kind")
+
+            # Desplazamos el espectrograma una columna a la izquierda, sin crear otro array
+            self.espectrograma[:, :-1] = self.espectrograma[:, 1:]
+            self.espectrograma[:, -1] = self.espectro
+            nuevas += 1
+        return nuevas
+
+    def duracion_espectrograma(self):
+        """Segundos que abarca el espectrograma completo."""
+        return self.espectrograma.shape[1] * self.salto / self.sample_rate
+
+
+def espectro_de(onda, sample_rate=SAMPLE_RATE, frecuencia_max=FRECUENCIA_MAX):
+    """Espectro en dB de una señal ya sintetizada, usando el mismo analizador (ventana final)."""
+    tamano = min(TAMANO_VENTANA * 4, 1 << max(8, int(np.log2(max(onda.size, 1)))))
+    analizador = AnalizadorEspectral(sample_rate, tamano, tamano, columnas=1, frecuencia_max=frecuencia_max)
+    analizador.agregar(onda[-analizador.anillo.size:])
+    analizador.procesar()
+    return analizador.frecuencias, analizador.espectro
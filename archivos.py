@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+
+def escribir_atomico(ruta, datos):
+    """Escribe en un archivo temporal y lo renombra: nadie ve nunca un archivo a medias."""
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(datos)
+        os.chmod(temporal, 0o644) # mkstemp crea el archivo solo legible por su dueño
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
@@ -0,0 +1,424 @@
+import functools
+import io
+import math
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from cache_disco import cache_disco
+from metricas import tramo
+from sintesis import ESCALA_16BIT, SAMPLE_RATE, onda_audio, ondas_lote
+
+# SciPy (remuestreo) y soundfile (FLAC/OGG) se importan solo cuando se usan
+_sf = None
+
+# --- Configuración de la caché de clips ---
+CACHE_MAX_BYTES = 32 * 1024 * 1024 # ~380 s de audio a 44,1 kHz / 16 bits
+PASO_FRECUENCIA = 0.01 # Hz
+PASO_AMPLITUD = 0.005 # Diferencias menores no se distinguen de oído
+PASO_DURACION = 0.001 # s
+
+# --- Configuración de la entrega de audio al navegador ---
+CALIDAD_OBJETIVO_DB = 40 # Relación señal/ruido de cuantización mínima aceptable
+FORMATOS_PERMITIDOS = ("pcm16", "pcm8", "flac") # Los que reproducen todos los navegadores
+TASAS_DISPONIBLES = (8000, 11025, 16000, 22050, 32000, SAMPLE_RATE)
+# Las que puede pedir un cliente (p. ej. la de su tarjeta, para que el navegador no remuestree)
+TASAS_CLIENTE = (8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000, 88200, 96000)
+MARGEN_NYQUIST = 1.25 # Holgura para la banda de transición del filtro antialiasing
+
+
+class CacheLRU:
+    """
+    Caché de bytes limitada por tamaño total, con expulsión del menos usado.
+
+    Es segura entre hilos: Streamlit ejecuta cada sesión en un hilo distinto
+    del mismo proceso, así que una sola instancia la comparten todas.
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consultar(self, clave):
+        """Valor guardado de `clave` (y lo marca como recién usado), o None si no está."""
+        with self._lock:
+            guardado = self._datos.get(clave)
+            if guardado is None:
+                self.misses += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return guardado[0]
+
+    def guardar(self, clave, valor, tamano=len):
+        """Guarda `valor` expulsando los menos usados si hace falta. Devuelve `valor`."""
+        ocupa = tamano(valor)
+        if ocupa > self.max_bytes:
+            return valor
+        with self._lock:
+            if clave not in self._datos:
+                self._datos[clave] = (valor, ocupa)
+                self.bytes += ocupa
+                while self.bytes > self.max_bytes:
+                    _, (_, liberado) = self._datos.popitem(last=False)
+                    self.bytes -= liberado
+        return valor
+
+    def obtener(self, clave, generar, tamano=len):
+        """
+        Devuelve el valor de `clave`, llamando a `generar()` solo si no está guardado.
+        `tamano(valor)` da los bytes que ocupa (por defecto, `len`).
+        """
+        valor = self.consultar(clave)
+        if valor is None:
+            # Generamos fuera del cerrojo para no bloquear a las demás sesiones
+            valor = self.guardar(clave, generar(), tamano)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def estadisticas(self):
+        """Contadores para depurar: aciertos, fallos, entradas y bytes ocupados."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "ratio": self.hits / total if total else 0.0,
+                "entradas": len(self._datos),
+                "bytes": self.bytes,
+            }
+
+
+# Caché única del proceso, compartida por todas las sesiones de Streamlit.
+# Debajo está cache_disco, compartida con los demás procesos: memoria → disco → síntesis
+cache_clips = CacheLRU()
+
+
+def _tamano_par(par):
+    return len(par[0])
+
+
+def _empaquetar(par):
+    """(bytes, tipo MIME) → un solo bloque para el disco: "audio/flac\\n" + bytes."""
+    datos, mime = par
+    return mime.encode("ascii") + b"\n" + datos
+
+
+def _desempaquetar(bloque):
+    separador = bytes(bloque[:64]).index(b"\n")
+    return bytes(bloque[separador + 1:]), bytes(bloque[:separador]).decode("ascii")
+
+
+def cuantizar(valor, paso):
+    return round(round(valor / paso) * paso, 6)
+
+
+# --- Escritor WAV propio: cabecera + PCM en un único búfer preasignado ---
+
+TAMANO_CABECERA_WAV = 44
+
+
+def cabecera_wav(buffer, bytes_datos, sample_rate=SAMPLE_RATE, dtype=np.int16):
+    """Escribe al principio de `buffer` la cabecera de un WAV PCM mono con `bytes_datos` de audio."""
+    dtype = np.dtype(dtype)
+    struct.pack_into(
+        "<4sI4s4sIHHIIHH4sI", buffer, 0,
+        b"RIFF", 36 + bytes_datos, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * dtype.itemsize, dtype.itemsize, 8 * dtype.itemsize,
+        b"data", bytes_datos,
+    )
+    return buffer
+
+
+def wav_vacio(n_muestras, sample_rate=SAMPLE_RATE, dtype=np.int16):
+    """
+    Reserva un WAV PCM mono completo y escribe su cabecera.
+
+    Devuelve (búfer, muestras): `muestras` es una vista NumPy sobre la zona de
+    datos del búfer, de modo que quien sintetiza escribe directamente en el archivo.
+    """
+    dtype = np.dtype(dtype)
+    bytes_datos = n_muestras * dtype.itemsize
+    buffer = cabecera_wav(bytearray(TAMANO_CABECERA_WAV + bytes_datos), bytes_datos, sample_rate, dtype)
+    muestras = np.frombuffer(buffer, dtype=dtype, count=n_muestras, offset=TAMANO_CABECERA_WAV)
+    return buffer, muestras
+
+
+def codificar_wav(audio_data, sample_rate=SAMPLE_RATE):
+    """Empaqueta muestras int16 o uint8 en un archivo WAV en memoria y devuelve sus bytes."""
+    buffer, muestras = wav_vacio(audio_data.size, sample_rate, audio_data.dtype)
+    muestras[:] = audio_data
+    return bytes(buffer)
+
+
+# --- Codificadores: reciben la onda en float32 [-1, 1] ---
+
+def _wav_pcm16(onda, sample_rate):
+    buffer, muestras = wav_vacio(onda.size, sample_rate, np.int16)
+    np.multiply(onda, ESCALA_16BIT, out=muestras, casting="unsafe")
+    return bytes(buffer)
+
+
+def _wav_pcm8(onda, sample_rate):
+    # El PCM de 8 bits en WAV es sin signo, centrado en 128
+    buffer, muestras = wav_vacio(onda.size, sample_rate, np.uint8)
+    np.multiply(onda, 127, out=onda)
+    np.add(onda, 128, out=muestras, casting="unsafe")
+    return bytes(buffer)
+
+
+# Límite superior de cada segmento de µ-law sobre las muestras de 14 bits
+SEGMENTOS_MULAW = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+SESGO_MULAW = 0x84 >> 2
+
+
+def codificar_mulaw(onda):
+    """
+    Codificación µ-law de G.711 (8 bits por muestra, ~38 dB de SNR a cualquier nivel).
+
+    Sigue la implementación de referencia (g711.c, la de audioop.lin2ulaw) bit a
+    bit: las muestras de 16 bits se reducen a 14, se suma el sesgo y se busca el
+    segmento en SEGMENTOS_MULAW; las que se salen del último van al código máximo.
+    """
+    muestras = (onda * ESCALA_16BIT).astype(np.int32) >> 2
+    mascara = np.where(muestras < 0, 0x7F, 0xFF)
+    magnitud = np.abs(muestras) + SESGO_MULAW
+    segmento = np.searchsorted(SEGMENTOS_MULAW, magnitud)
+    codigo = (np.minimum(segmento, 7) << 4) | ((magnitud >> (segmento + 1)) & 0x0F)
+    codigo = np.where(segmento >= len(SEGMENTOS_MULAW), 0x7F, codigo)
+    return (codigo ^ mascara).astype(np.uint8)
+
+
+def _wav_mulaw(onda, sample_rate):
+    datos = codificar_mulaw(onda).tobytes()
+    # WAVE_FORMAT_MULAW (7): bloque fmt de 18 bytes y bloque fact obligatorios
+    fmt = struct.pack("<HHIIHHH", 7, 1, sample_rate, sample_rate, 1, 8, 0)
+    fact = struct.pack("<I", len(datos))
+    cuerpo = (b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+              + b"fact" + struct.pack("<I", len(fact)) + fact
+              + b"data" + struct.pack("<I", len(datos)) + datos)
+    if len(datos) % 2:
+        cuerpo += b"\0"
+    return b"RIFF" + struct.pack("<I", len(cuerpo)) + cuerpo
+
+
+def _importar_soundfile():
+    """Importa soundfile la primera vez; devuelve None si no está instalado."""
+    global _sf
+    if _sf is None:
+        try:
+            import soundfile
+            _sf = soundfile
+        except (ImportError, OSError):
+            _sf = False
+    return _sf or None
+
+
+def _soundfile(formato, subtipo):
+    def codificar(onda, sample_rate):
+        buffer = io.BytesIO()
+        _importar_soundfile().write(buffer, onda, sample_rate, format=formato, subtype=subtipo)
+        return buffer.getvalue()
+    return codificar
+
+
+# nombre: (tipo MIME, SNR nominal en dB a plena escala, ¿SNR proporcional al nivel?, codificador)
+FORMATOS = {
+    "pcm16": ("audio/wav", 96, True, _wav_pcm16),
+    "flac": ("audio/flac", 96, True, _soundfile("FLAC", "PCM_16")),
+    "pcm8": ("audio/wav", 48, True, _wav_pcm8),
+    "mulaw": ("audio/wav", 38, False, _wav_mulaw),
+    "ogg": ("audio/ogg", 40, False, _soundfile("OGG", "VORBIS")),
+}
+
+
+def formato_disponible(formato):
+    if formato in ("flac", "ogg"):
+        return _importar_soundfile() is not None
+    return formato in FORMATOS
+
+
+def snr_efectiva(formato, amplitud):
+    """SNR esperada para una señal de pico `amplitud`: en PCM lineal baja 6 dB por cada mitad."""
+    _, snr, lineal, _ = FORMATOS[formato]
+    if lineal and amplitud > 0:
+        return snr + 20 * math.log10(amplitud)
+    return snr
+
+
+def tasa_minima(frecuencia_max):
+    """Menor frecuencia de muestreo disponible que representa `frecuencia_max` con margen."""
+    for tasa in TASAS_DISPONIBLES:
+        if tasa >= 2 * MARGEN_NYQUIST * frecuencia_max:
+            return tasa
+    return TASAS_DISPONIBLES[-1]
+
+
+def tasa_cliente(valor):
+    """La frecuencia de muestreo que pide un cliente (texto o número), o None si no es una de TASAS_CLIENTE."""
+    try:
+        tasa = int(valor)
+    except (TypeError, ValueError):
+        return None
+    return tasa if tasa in TASAS_CLIENTE else None
+
+
+@functools.lru_cache(maxsize=32)
+def filtro_remuestreo(arriba, abajo):
+    """
+    Coeficientes del filtro antialiasing de `resample_poly` para arriba/abajo.
+
+    Es el mismo diseño que haría `resample_poly` por defecto (ventana de Kaiser,
+    β = 5), pero se calcula una sola vez por pareja de frecuencias.
+    """
+    from scipy.signal import firwin
+    maximo = max(arriba, abajo)
+    filtro = firwin(2 * 10 * maximo + 1, 1 / maximo, window=("kaiser", 5.0))
+    filtro.flags.writeable = False
+    return filtro
+
+
+def remuestrear(onda, origen, destino):
+    """Cambio de frecuencia de muestreo polifásico, con filtro antialiasing."""
+    if origen == destino:
+        return onda
+    from scipy.signal import resample_poly
+    divisor = math.gcd(origen, destino)
+    arriba, abajo = destino // divisor, origen // divisor
+    # resample_poly copia la ventana antes de escalarla: el filtro cacheado no cambia
+    resultado = resample_poly(onda, arriba, abajo, window=filtro_remuestreo(arriba, abajo)).astype(np.float32)
+    # El filtro puede sobrepasar ligeramente ±1 cerca de los picos
+    return np.clip(resultado, -1.0, 1.0, out=resultado)
+
+
+def _parametros_clave(frecuencia, amplitud, duracion):
+    return (cuantizar(frecuencia, PASO_FRECUENCIA), cuantizar(amplitud, PASO_AMPLITUD),
+            cuantizar(duracion, PASO_DURACION))
+
+
+def _codificar_tono(formato, frecuencia, amplitud, duracion, es_compleja, sample_rate):
+    frecuencia_max = frecuencia * (2 if es_compleja else 1)
+    if sample_rate >= 2 * frecuencia_max:
+        # El tono ya cabe en la banda: sintetizar a la frecuencia de destino es exacto
+        onda = onda_audio(frecuencia, amplitud, duracion, es_compleja, sample_rate=sample_rate)
+    else:
+        # Si no cabe, el filtro del remuestreo elimina lo que produciría aliasing
+        onda = onda_audio(frecuencia, amplitud, duracion, es_compleja)
+        with tramo("remuestreo"):
+            onda = remuestrear(onda, SAMPLE_RATE, sample_rate)
+    with tramo("codificacion"):
+        return FORMATOS[formato][3](onda, sample_rate)
+
+
+def clip_audio(frecuencia, amplitud, duracion, formato="pcm16", sample_rate=SAMPLE_RATE, es_compleja=False):
+    """
+    Devuelve los bytes de un tono en el `formato` y a la `sample_rate` pedidos.
+
+    Los parámetros se cuantizan antes de sintetizar, de modo que la clave de la
+    caché describe exactamente el audio guardado. Si no está en memoria se busca
+    en la caché en disco, que comparten todos los procesos.
+    """
+    if not formato_disponible(formato):
+        raise ValueError(f"Formato de audio no disponible: {formato}")
+    frecuencia, amplitud, duracion = _parametros_clave(frecuencia, amplitud, duracion)
+    clave = (formato, frecuencia, amplitud, duracion, es_compleja, sample_rate)
+    return cache_clips.obtener(clave, lambda: bytes(cache_disco.obtener(
+        clave, lambda: _codificar_tono(formato, frecuencia, amplitud, duracion, es_compleja, sample_rate))))
+
+
+def clip_wav(frecuencia, amplitud, duracion, sample_rate=SAMPLE_RATE):
+    """Devuelve los bytes WAV (16 bits, mono) de un tono senoidal."""
+    return clip_audio(frecuencia, amplitud, duracion, "pcm16", sample_rate)
+
+
+def clip_compacto(frecuencia, amplitud, duracion, es_compleja=False,
+                  calidad_db=CALIDAD_OBJETIVO_DB, formatos=FORMATOS_PERMITIDOS, sample_rate=None):
+    """
+    Devuelve (bytes, tipo MIME) con la codificación más pequeña que cumple `calidad_db`.
+
+    La frecuencia de muestreo es la menor que conserva el armónico más alto, o
+    `sample_rate` si el cliente pide una (la de su dispositivo); entre los formatos con SNR suficiente para esta amplitud se codifican todos
+    y se queda el de menos bytes. La elección se guarda en la caché de clips y
+    en la de disco.
+    """
+    frecuencia, amplitud, duracion = _parametros_clave(frecuencia, amplitud, duracion)
+    clave = ("compacto", frecuencia, amplitud, duracion, es_compleja, calidad_db, tuple(formatos), sample_rate)
+
+    def generar():
+        tasa = sample_rate or tasa_minima(frecuencia * (2 if es_compleja else 1))
+        codificados = [(_codificar_tono(f, frecuencia, amplitud, duracion, es_compleja, tasa), FORMATOS[f][0])
+                       for f in _candidatos(amplitud, calidad_db, formatos)]
+        return _empaquetar(min(codificados, key=_tamano_par))
+
+    return cache_clips.obtener(clave, lambda: _desempaquetar(cache_disco.obtener(clave, generar)), _tamano_par)
+
+
+def _compacto_guardado(clave):
+    """(bytes, tipo MIME) de la memoria o, si no, del disco (y se sube a memoria); None si no está."""
+    par = cache_clips.consultar(clave)
+    if par is None:
+        bloque = cache_disco.leer(clave)
+        if bloque is not None:
+            par = cache_clips.guardar(clave, _desempaquetar(bloque), _tamano_par)
+    return par
+
+
+def _candidatos(amplitud, calidad_db, formatos):
+    """Formatos disponibles con SNR suficiente para `amplitud` (como mínimo, PCM de 16 bits)."""
+    candidatos = [f for f in formatos if formato_disponible(f) and snr_efectiva(f, amplitud) >= calidad_db]
+    return candidatos or ["pcm16"]
+
+
+def clips_compactos(tonos, duracion, calidad_db=CALIDAD_OBJETIVO_DB, formatos=FORMATOS_PERMITIDOS, sample_rate=None):
+    """
+    Como `clip_compacto` para una lista de tonos puros [(frecuencia, amplitud), ...].
+
+    Los que ya están en memoria o en disco no se vuelven a sintetizar; el resto,
+    si comparten frecuencia de muestreo (la mínima de cada uno, o `sample_rate`
+    si se pide una), se sintetizan juntos con una sola llamada a `ondas_lote`.
+    Cada fila se codifica y se guarda en las dos cachés con la misma clave que
+    usaría `clip_compacto`. Devuelve la lista de (bytes, tipo MIME) en el orden
+    de `tonos`.
+    """
+    tonos = [_parametros_clave(frecuencia, amplitud, duracion)[:2] for frecuencia, amplitud in tonos]
+    duracion = cuantizar(duracion, PASO_DURACION)
+    claves = [("compacto", frecuencia, amplitud, duracion, False, calidad_db, tuple(formatos), sample_rate)
+              for frecuencia, amplitud in tonos]
+
+    # Solo se sintetiza lo que no está ni en memoria ni en disco
+    resultados = [_compacto_guardado(clave) for clave in claves]
+    grupos = {}
+    for i, (frecuencia, _) in enumerate(tonos):
+        if resultados[i] is None:
+            grupos.setdefault(sample_rate or tasa_minima(frecuencia), []).append(i)
+
+    for tasa, indices in grupos.items():
+        # Los que no caben en la banda: clip_compacto los remuestrea con filtro antialiasing
+        for i in [i for i in indices if tasa < 2 * tonos[i][0]]:
+            resultados[i] = clip_compacto(*tonos[i], duracion, calidad_db=calidad_db, formatos=formatos,
+                                          sample_rate=sample_rate)
+        indices = [i for i in indices if resultados[i] is None]
+        if not indices:
+            continue
+        ondas = ondas_lote([tonos[i][0] for i in indices], [tonos[i][1] for i in indices], duracion, tasa)
+        for fila, i in zip(ondas, indices):
+            # Algunos codificadores escalan la onda in-place: cada uno recibe su copia
+            with tramo("codificacion"):
+                codificados = [(FORMATOS[f][3](fila.copy(), tasa), FORMATOS[f][0])
+                               for f in _candidatos(tonos[i][1], calidad_db, formatos)]
+            par = min(codificados, key=_tamano_par)
+            cache_disco.guardar(claves[i], _empaquetar(par))
+            resultados[i] = cache_clips.guardar(claves[i], par, _tamano_par)
+    return resultados
@@ -0,0 +1,122 @@
+"""
+Tiempo de arranque en frío de cada punto de entrada, medido con `python -X importtime`.
+
+Ejecuta cada app tal cual (con runpy, en un intérprete nuevo) en el árbol actual
+("ahora") y en el de una revisión anterior ("antes", por defecto el primer commit
+del repositorio, extraída con `git archive`), y suma el tiempo de todas las
+importaciones que hace. Las páginas de Streamlit se ejecutan sin servidor (en
+ese modo los fragmentos no se ejecutan) y las apps de Tk no abren ventana: solo
+corre lo que no está bajo el `if __name__` de `__main__`. Si una app se detiene
+a medias (p. ej. sounddevice sin PortAudio), cuenta lo importado hasta ahí y se
+indica. Cada medición se repite varias veces, alternando antes y ahora, y se
+queda el mínimo. Termina con error si alguna app arranca más despacio que antes
+(salvo si antes se detuvo a medias) o si ahora se detiene.
+
+Uso: python benchmarks/bench_arranque.py [--antes REVISION] [--repeticiones 5] [--detalle]
+"""
+import argparse
+import io
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRADAS = ["juego_sonido.py", "ondas_sonido.py", "ondas_web.py", "juego_partes_oido.py"]
+
+LINEA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (.*)$")
+MARCA_ERROR = "[arranque detenido]"
+
+
+def codigo_ejecucion(app):
+    # Un error al ejecutar (p. ej. sounddevice sin PortAudio) no debe romper la
+    # medición: las importaciones hechas hasta ese punto ya están contadas
+    return (
+        "import runpy\n"
+        "try:\n"
+        f"    runpy.run_path({app!r}, run_name='__arranque__')\n"
+        "except BaseException as error:\n"
+        f"    print({MARCA_ERROR!r}, type(error).__name__, error)\n"
+    )
+
+
+def medir(directorio, app):
+    """
+    Devuelve (microsegundos totales de importación, [(acumulado, módulo de primer
+    nivel)], error con el que se detuvo la app o "").
+    """
+    # Sin caché en disco: que un PNG guardado por otra ejecución no evite cargar matplotlib
+    entorno = dict(os.environ, MPLBACKEND="Agg", VISUALIZADOR_CACHE_DISCO="0", PYTHONPATH=directorio)
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo_ejecucion(app)],
+        cwd=directorio, env=entorno, capture_output=True, text=True,
+    )
+    total = 0
+    primer_nivel = []
+    for linea in proceso.stderr.splitlines():
+        coincidencia = LINEA.match(linea)
+        if not coincidencia:
+            continue
+        propio, acumulado, nombre = coincidencia.groups()
+        total += int(propio)
+        if not nombre.startswith(" "):
+            primer_nivel.append((int(acumulado), nombre.strip()))
+    errores = [linea[len(MARCA_ERROR):].strip() for linea in proceso.stdout.splitlines() if linea.startswith(MARCA_ERROR)]
+    return total, sorted(primer_nivel, reverse=True), errores[-1] if errores else ""
+
+
+def extraer(revision, destino):
+    """Copia en `destino` el árbol de `revision`."""
+    archivo = subprocess.run(["git", "archive", revision], cwd=RAIZ, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archivo)) as tar:
+        tar.extractall(destino, filter="data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--antes", help="revisión con la que comparar (por defecto, el primer commit)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--detalle", action="store_true", help="muestra los módulos más pesados")
+    args = parser.parse_args()
+
+    revision = args.antes or subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True,
+    ).stdout.split()[0]
+    peores = []
+    with tempfile.TemporaryDirectory() as anterior:
+        extraer(revision, anterior)
+        for app in ENTRADAS:
+            if not os.path.exists(os.path.join(anterior, app)):
+                print(f"{app:22s} no existe en {revision[:10]}")
+                continue
+            # Alternando antes y ahora, la caché del disco y la frecuencia de la CPU
+            # afectan a las dos por igual
+            mediciones = {"antes": [], "ahora": []}
+            for _ in range(args.repeticiones):
+                for etiqueta, directorio in (("antes", anterior), ("ahora", RAIZ)):
+                    mediciones[etiqueta].append(medir(directorio, app))
+            resultados = {etiqueta: min(m, key=lambda m: m[0]) for etiqueta, m in mediciones.items()}
+            t_antes, t_ahora = resultados["antes"][0] / 1000, resultados["ahora"][0] / 1000
+            error_antes, error_ahora = resultados["antes"][2], resultados["ahora"][2]
+            # Si antes se detuvo a medias, faltan importaciones: no es comparable
+            aviso = "   MÁS LENTO" if t_ahora > t_antes and not error_antes else ""
+            print(f"{app:22s} antes {t_antes:8.1f} ms   ahora {t_ahora:8.1f} ms   "
+                  f"ahorro {t_antes - t_ahora:8.1f} ms ({100 * (1 - t_ahora / t_antes):5.1f} %){aviso}")
+            for etiqueta, error in (("antes", error_antes), ("ahora", error_ahora)):
+                if error:
+                    print(f"    {etiqueta} se detuvo en: {error}")
+            if aviso or error_ahora:
+                peores.append(app)
+            if args.detalle:
+                for etiqueta in ("antes", "ahora"):
+                    pesados = ", ".join(f"{nombre} {us / 1000:.0f} ms" for us, nombre in resultados[etiqueta][1][:5])
+                    print(f"    {etiqueta}: {pesados}")
+    if peores:
+        sys.exit(f"arrancan más despacio que en {revision[:10]} (o fallan): {', '.join(peores)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Escalado de renderizar_lote.py con el número de procesos.
+
+Renderiza el mismo barrido en carpetas temporales vacías con 1, 2, 4... procesos
+(hasta el número de núcleos) y muestra el ritmo y la aceleración respecto a 1.
+
+Uso: python benchmarks/bench_lote.py [--frecuencias 12] [--procesos 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frecuencias", type=int, default=12, help="pasos de frecuencia del barrido")
+    parser.add_argument("--procesos", type=int, nargs="+")
+    args = parser.parse_args()
+
+    from renderizar_lote import renderizar_barrido
+
+    nucleos = os.cpu_count() or 1
+    procesos = args.procesos or sorted({1, *(2**i for i in range(1, nucleos.bit_length()) if 2**i <= nucleos), nucleos})
+    barrido = {
+        "frecuencias": {"desde": 110, "hasta": 1760, "pasos": args.frecuencias, "escala": "log"},
+        "amplitudes": [0.5, 1.0],
+        "duraciones": [1.0],
+        "timbres": ["Pura", "Cuadrada", "Violín"],
+        "formatos": ["wav", "png"],
+    }
+    base = None
+    for n in procesos:
+        with tempfile.TemporaryDirectory() as salida:
+            manifiesto = renderizar_barrido(barrido, salida, n)
+        ritmo = len(manifiesto["clips"]) / manifiesto["segundos"]
+        base = base or ritmo
+        print(f"{n:3d} procesos  {manifiesto['segundos']:7.2f} s  {ritmo:7.1f} combinaciones/s  "
+              f"aceleración x{ritmo / base:5.2f}  (ideal x{n})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Núcleos compilados con Numba frente a la síntesis con ufuncs de NumPy.
+
+Primero comprueba que los dos backends de sintesis.generar_onda dan la misma onda
+(comprobar_paridad) y termina con error si no es así. Después mide
+generar_onda con clips de varios segundos, con y sin armónicos, en float32 y en
+int16 (como los WAV), con cada backend, y muestra la aceleración. Necesita Numba.
+
+Uso: python benchmarks/bench_nucleos.py [--duracion 5] [--repeticiones 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# --- Paridad con el backend de NumPy ---
+# Diferencia máxima admitida frente al backend de NumPy, que calcula el seno en
+# float32; en int16, un escalón por redondeo en el truncado
+TOLERANCIA_FLOAT = 1e-5
+TOLERANCIA_ENTERA = 1
+
+CASOS_PARIDAD = [
+    # (frecuencia, amplitud, duración, es_compleja, timbre)
+    (440.0, 0.8, 1.0, False, None),
+    (3.5, 1.0, 2.0, False, None),
+    (440.0, 0.7, 1.0, True, None),
+    (0.25, 0.5, 1.0, True, None), # clip más corto que un periodo: el pico no es PICO_ARMONICO
+    (9876.5, 0.9, 0.3, True, None), # pocas muestras por periodo: el pico muestreado queda lejos del real
+    (110.0, 1.0, 2.0, False, "Cuadrada"),
+    (1760.0, 0.6, 1.0, False, "Diente de sierra"),
+    (220.0, 0.9, 0.5, False, "Violín"),
+]
+
+
+def comprobar_paridad(casos=CASOS_PARIDAD):
+    """
+    Compara sintesis.generar_onda con los dos backends en `casos`, en float32 y en int16.
+
+    Devuelve [(caso, dtype, diferencia máxima, dentro de tolerancia)].
+    """
+    import numpy as np
+    import sintesis
+
+    resultados = []
+    anterior = sintesis.backend
+    try:
+        for caso in casos:
+            frecuencia, amplitud, duracion, es_compleja, timbre = caso
+            n = sintesis.muestras_audio(duracion)
+            for dtype in (np.float32, np.int16):
+                ondas = []
+                for nombre in sintesis.BACKENDS:
+                    sintesis.usar_backend(nombre)
+                    ondas.append(sintesis.generar_onda(frecuencia, amplitud, n, 1 / sintesis.SAMPLE_RATE,
+                                                       es_compleja, dtype=dtype, timbre=timbre))
+                diferencia = float(np.max(np.abs(ondas[0].astype(np.float64) - ondas[1]), initial=0.0))
+                tolerancia = TOLERANCIA_ENTERA if np.issubdtype(dtype, np.integer) else TOLERANCIA_FLOAT
+                resultados.append((caso, np.dtype(dtype).name, diferencia, diferencia <= tolerancia))
+    finally:
+        sintesis.usar_backend(anterior)
+    return resultados
+
+
+def medir(funcion, repeticiones):
+    """Mediana en milisegundos de `repeticiones` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duracion", type=float, default=5.0, help="segundos de cada clip")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    import numpy as np
+    import sintesis
+    from sintesis import SAMPLE_RATE, generar_onda, muestras_audio
+
+    try:
+        import nucleos # noqa: F401
+    except ImportError:
+        sys.exit("Numba no está instalado: no hay nada que comparar")
+
+    inicio = time.perf_counter()
+    paridad = comprobar_paridad() # incluye la primera compilación
+    print(f"paridad: {len(paridad)} casos en {time.perf_counter() - inicio:.2f} s (con compilación)")
+    fallos = [r for r in paridad if not r[-1]]
+    for caso, dtype, diferencia, _ in fallos:
+        print(f"  FALLO {caso} {dtype}: diferencia {diferencia:g}")
+    if fallos:
+        sys.exit(1)
+
+    n = muestras_audio(args.duracion)
+    casos = [
+        ("seno puro", 440.0, False, None),
+        ("armónico 2× normalizado", 440.0, True, None),
+        ("Cuadrada (64 armónicos)", 110.0, False, "Cuadrada"),
+        ("Violín (12 armónicos)", 220.0, False, "Violín"),
+    ]
+    print(f"{args.duracion:g} s a {SAMPLE_RATE} Hz, mediana de {args.repeticiones}")
+    print(f"  {'caso':26s} {'dtype':8s} {'numpy':>9s} {'numba':>9s}  aceleración")
+    for nombre, frecuencia, es_compleja, timbre in casos:
+        for dtype in (np.float32, np.int16):
+            out = np.empty(n, dtype=dtype)
+            tiempos = []
+            for backend in sintesis.BACKENDS[::-1]:
+                sintesis.usar_backend(backend)
+                tiempos.append(medir(lambda: generar_onda(frecuencia, 0.8, n, 1 / SAMPLE_RATE, es_compleja,
+                                                          out=out, timbre=timbre), args.repeticiones))
+            print(f"  {nombre:26s} {np.dtype(dtype).name:8s} {tiempos[0]:7.2f} ms {tiempos[1]:7.2f} ms"
+                  f"  x{tiempos[0] / tiempos[1]:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
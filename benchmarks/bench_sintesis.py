@@ -0,0 +1,75 @@
+"""
+Compara la síntesis antigua (linspace + sin + normalizar + astype) con sintesis.py.
+
+Uso: python benchmarks/bench_sintesis.py [--duracion 3.0] [--repeticiones 50]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sintesis import SAMPLE_RATE, onda_audio  # noqa: E402
+
+
+def onda_antigua(frecuencia, amplitud, duracion, es_compleja):
+    """Copia literal del código que había en AppOndas.reproducir_sonido."""
+    sample_rate = 44100
+    puntos_audio = int(duracion * sample_rate)
+    tiempo = np.linspace(0, duracion, puntos_audio, endpoint=False)
+    if es_compleja:
+        onda_principal = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
+        armonico = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo)
+        onda = onda_principal + armonico
+        max_val = np.max(np.abs(onda))
+        if max_val > 0: onda = (onda / max_val) * amplitud
+    else:
+        onda = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
+    return onda.astype(np.float32)
+
+
+def onda_nueva(frecuencia, amplitud, duracion, es_compleja, out):
+    return onda_audio(frecuencia, amplitud, duracion, es_compleja, out=out)
+
+
+def medir(funcion, repeticiones, *args):
+    """Devuelve (muestras/s, pico de memoria asignada durante una llamada en bytes)."""
+    funcion(*args) # calentamiento (búferes de trabajo, cachés de NumPy)
+
+    tracemalloc.start()
+    funcion(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        salida = funcion(*args)
+    transcurrido = time.perf_counter() - inicio
+    return salida.size * repeticiones / transcurrido, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duracion", type=float, default=3.0)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    out = np.empty(int(args.duracion * SAMPLE_RATE), dtype=np.float32)
+    for es_compleja in (False, True):
+        etiqueta = "compleja" if es_compleja else "pura"
+        parametros = (440.0, 0.8, args.duracion, es_compleja)
+        antigua = medir(onda_antigua, args.repeticiones, *parametros)
+        nueva = medir(onda_nueva, args.repeticiones, *parametros, out)
+        error = np.max(np.abs(onda_antigua(*parametros) - onda_nueva(*parametros, out)))
+
+        print(f"Onda {etiqueta} ({args.duracion} s a {SAMPLE_RATE} Hz), error máximo {error:.2e}")
+        for nombre, (velocidad, pico) in (("antigua", antigua), ("nueva", nueva)):
+            print(f"  {nombre:8s} {velocidad / 1e6:8.1f} M muestras/s  "
+                  f"memoria temporal {pico / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
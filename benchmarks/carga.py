@@ -0,0 +1,397 @@
+"""
+Prueba de carga: muchas sesiones simultáneas de las apps de Streamlit.
+
+Cada sesión sigue un guion de clics y movimientos de sliders elegidos al azar
+(con semilla). Hay dos modos:
+
+- servidor (por defecto): arranca `streamlit run` en local y conecta todas las
+  sesiones a la vez por websocket, hablando el mismo protocolo (protobuf) que
+  el navegador. Es lo más parecido a una clase entera usando un proceso.
+- apptest: cada sesión es un AppTest con su propio st.session_state. AppTest
+  instala un Runtime global en cada rerun, así que los reruns se ejecutan uno
+  tras otro (las sesiones se intercalan); a cambio se puede medir el tamaño de
+  st.session_state de cada sesión, que desde fuera del servidor no se ve.
+
+Informa de la latencia p50/p95/p99 por rerun, los reruns por segundo, el
+tamaño de session_state (modo apptest) y la memoria residente del proceso que
+atiende las sesiones. Sale con código 1 si alguna sesión falla o se supera
+alguno de los límites --max-* / --min-*.
+
+Uso:
+    python benchmarks/carga.py --app juego_sonido --sesiones 200 --pausa 3
+    python benchmarks/carga.py --modo apptest --sesiones 50 --max-estado 256
+    python benchmarks/carga.py --max-p95 500 --max-rss 1500
+"""
+import argparse
+import asyncio
+import os
+import pickle
+import random
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def rss_mib(pid="self"):
+    """Memoria residente actual de un proceso (Linux)."""
+    with open(f"/proc/{pid}/statm") as f:
+        paginas = int(f.read().split()[1])
+    return paginas * resource.getpagesize() / 2**20
+
+
+def percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+# --- Guiones: a partir de lo que se ve en pantalla, eligen la siguiente acción ---
+# `botones` es una lista de (clave, etiqueta) y `sliders` el número de sliders.
+# Devuelven ("pulsar", índice del botón) o ("mover", índice del slider, valor).
+
+def _paso_juego(botones, sliders, azar):
+    # Si hay opciones de respuesta se contesta una al azar; si no, se pide otra pregunta
+    opciones = [i for i, (clave, _) in enumerate(botones) if clave.startswith("op_")]
+    if opciones:
+        return ("pulsar", azar.choice(opciones))
+    return ("pulsar", 0)
+
+
+def _paso_ondas_web(botones, sliders, azar):
+    # El botón de reproducir usa la tarjeta de sonido del servidor: solo se mueven sliders
+    slider = azar.randrange(3)
+    valor = (azar.choice(range(2, 101)) / 2, round(azar.uniform(0.1, 1.0), 2),
+             round(azar.uniform(0.1, 3.0), 2))[slider]
+    return ("mover", slider, valor)
+
+
+GUIONES = {
+    "juego_sonido": ("juego_sonido.py", _paso_juego),
+    "juego_partes_oido": ("juego_partes_oido.py", _paso_juego),
+    "ondas_web": ("ondas_web.py", _paso_ondas_web),
+}
+
+
+class Resultados:
+    """Latencias y errores acumulados por todas las sesiones de una app."""
+
+    def __init__(self):
+        self.latencias = []
+        self.deltas = [] # mensajes delta por rerun (modo servidor)
+        self.estados = []
+        self.errores = []
+        self._lock = threading.Lock()
+
+    def anotar(self, latencias, estado=None, error=None, deltas=()):
+        with self._lock:
+            self.latencias.extend(latencias)
+            self.deltas.extend(deltas)
+            if estado is not None:
+                self.estados.append(estado)
+            if error:
+                self.errores.append(error)
+
+    def resumen(self, duracion, rss_inicial, rss_pico):
+        latencias = sorted(self.latencias) or [0.0]
+        estados = sorted(self.estados)
+        return {
+            "reruns": len(self.latencias),
+            "reruns_por_s": len(self.latencias) / duracion,
+            "p50_ms": percentil(latencias, 50),
+            "p95_ms": percentil(latencias, 95),
+            "p99_ms": percentil(latencias, 99),
+            "deltas_por_rerun": sum(self.deltas) / len(self.deltas) if self.deltas else None,
+            "estado_medio_kib": sum(estados) / len(estados) / 1024 if estados else None,
+            "estado_max_kib": estados[-1] / 1024 if estados else None,
+            "rss_inicial_mib": rss_inicial,
+            "rss_pico_mib": rss_pico,
+            "errores": self.errores,
+        }
+
+
+class VigilanteMemoria:
+    """Hilo que anota el pico de memoria residente de un proceso mientras dura la prueba."""
+
+    def __init__(self, pid="self", intervalo=0.2):
+        self.pid = pid
+        self.inicial = self.pico = rss_mib(pid)
+        self._terminado = threading.Event()
+        self._hilo = threading.Thread(target=self._vigilar, args=(intervalo,), daemon=True)
+        self._hilo.start()
+
+    def _vigilar(self, intervalo):
+        while not self._terminado.wait(intervalo):
+            self.pico = max(self.pico, rss_mib(self.pid))
+
+    def detener(self):
+        self._terminado.set()
+        self._hilo.join()
+        self.pico = max(self.pico, rss_mib(self.pid))
+        return self.pico
+
+
+# --- Modo apptest ---
+
+def tamano_estado(at):
+    """Bytes que ocupa st.session_state de la sesión, serializado con pickle."""
+    total = 0
+    for valor in at.session_state.to_dict().values():
+        try:
+            total += len(pickle.dumps(valor))
+        except Exception: # p. ej. objetos con cerrojos: cuenta solo su cabecera
+            total += sys.getsizeof(valor)
+    return total
+
+
+def _rerun_apptest(at, paso, azar):
+    botones = [(b.key or "", b.label) for b in at.button]
+    accion = paso(botones, len(at.slider), azar)
+    if accion[0] == "pulsar":
+        at.button[accion[1]].click().run()
+    else:
+        at.slider[accion[1]].set_value(accion[2]).run()
+
+
+def probar_apptest(app, args):
+    from streamlit.testing.v1 import AppTest
+
+    script, paso = GUIONES[app]
+    resultados = Resultados()
+    vigilante = VigilanteMemoria()
+    sesiones = [(AppTest.from_file(os.path.join(RAIZ, script), default_timeout=120), random.Random(args.semilla + i))
+                for i in range(args.sesiones)]
+    vivas = list(sesiones)
+    inicio = time.perf_counter()
+    for ronda in range(args.acciones + 1):
+        for at, azar in list(vivas):
+            t0 = time.perf_counter()
+            try:
+                if ronda == 0:
+                    at.run()
+                else:
+                    _rerun_apptest(at, paso, azar)
+                error = at.exception[0].message if at.exception else None
+            except Exception as excepcion:
+                error = f"{type(excepcion).__name__}: {excepcion}"
+            resultados.anotar([(time.perf_counter() - t0) * 1000], error=error)
+            if error:
+                vivas.remove((at, azar))
+    duracion = time.perf_counter() - inicio
+    for at, _ in sesiones:
+        resultados.estados.append(tamano_estado(at))
+    return resultados.resumen(duracion, vigilante.inicial, vigilante.detener())
+
+
+# --- Modo servidor ---
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def arrancar_servidor(script, puerto, espera=60):
+    """Lanza `streamlit run` y espera a que responda el endpoint de salud."""
+    import urllib.request
+
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless", "true",
+         "--server.port", str(puerto), "--browser.gatherUsageStats", "false"],
+        cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/_stcore/health", timeout=1):
+                return proceso
+        except OSError:
+            if proceso.poll() is not None:
+                break
+            time.sleep(0.2)
+    proceso.kill()
+    raise RuntimeError(f"No se pudo arrancar streamlit con {script}")
+
+
+class SesionWebsocket:
+    """Una pestaña del navegador: envía BackMsg y lee ForwardMsg hasta que acaba cada rerun."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.hash_pagina = ""
+        # Widgets en pantalla por id, en orden de aparición. Un rerun de un
+        # st.fragment vuelve a enviar solo sus widgets, que sustituyen a los de antes.
+        self.botones = {} # id: (clave, etiqueta, fragmento)
+        self.sliders = {} # id: fragmento
+        self.deltas = 0 # elementos recibidos en el último rerun
+        self.ejecuciones = 0 # veces que se ejecutó el script en el último rerun (st.rerun añade una)
+
+    async def rerun(self, estados=(), fragmento=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        mensaje = BackMsg()
+        mensaje.rerun_script.query_string = ""
+        mensaje.rerun_script.page_script_hash = self.hash_pagina
+        mensaje.rerun_script.widget_states.widgets.extend(estados)
+        # Como el navegador: un widget dentro de un fragmento solo vuelve a ejecutar ese fragmento
+        mensaje.rerun_script.fragment_id = fragmento
+        await self.ws.send(mensaje.SerializeToString())
+
+        error = None
+        self.deltas = 0
+        self.ejecuciones = 0
+        while True:
+            recibido = ForwardMsg()
+            recibido.ParseFromString(await self.ws.recv())
+            tipo = recibido.WhichOneof("type")
+            if tipo == "new_session":
+                # Empieza una ejecución del script (también tras un st.rerun)
+                self.hash_pagina = recibido.new_session.main_script_hash
+                if not fragmento:
+                    self.botones, self.sliders = {}, {}
+            elif tipo == "delta":
+                self.deltas += 1
+                if recibido.delta.WhichOneof("type") != "new_element":
+                    continue
+                elemento = recibido.delta.new_element
+                clase = elemento.WhichOneof("type")
+                if clase == "button":
+                    # El id de un widget con key termina en "-<key>"
+                    clave = elemento.button.id.rsplit("-", 1)[-1]
+                    self.botones[elemento.button.id] = ("" if clave == "None" else clave, elemento.button.label,
+                                                        recibido.delta.fragment_id)
+                elif clase == "slider":
+                    self.sliders[elemento.slider.id] = recibido.delta.fragment_id
+                elif clase == "exception":
+                    error = elemento.exception.message
+            elif tipo == "script_finished":
+                self.ejecuciones += 1
+                if recibido.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return error
+
+    async def accion(self, paso, azar):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        botones = list(self.botones.items())
+        accion = paso([(clave, etiqueta) for _, (clave, etiqueta, _) in botones], len(self.sliders), azar)
+        estado = WidgetState()
+        if accion[0] == "pulsar":
+            estado.id, (_, _, fragmento) = botones[accion[1]]
+            estado.trigger_value = True
+        else:
+            estado.id, fragmento = list(self.sliders.items())[accion[1]]
+            estado.double_array_value.data.append(accion[2])
+        return await self.rerun([estado], fragmento)
+
+
+async def _sesion_servidor(url, paso, acciones, pausa, azar, resultados):
+    import websockets
+
+    latencias = []
+    deltas = []
+    error = None
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            sesion = SesionWebsocket(ws)
+            for i in range(acciones + 1):
+                if i and pausa:
+                    # Tiempo de pensar del alumno entre dos acciones (0,5x a 1,5x la pausa)
+                    await asyncio.sleep(pausa * azar.uniform(0.5, 1.5))
+                t0 = time.perf_counter()
+                error = await (sesion.rerun() if i == 0 else sesion.accion(paso, azar))
+                latencias.append((time.perf_counter() - t0) * 1000)
+                if i:
+                    deltas.append(sesion.deltas)
+                if error:
+                    break
+    except Exception as excepcion:
+        error = f"{type(excepcion).__name__}: {excepcion}"
+    resultados.anotar(latencias, error=error, deltas=deltas)
+
+
+async def _lanzar_sesiones(url, paso, args, resultados):
+    # Las sesiones llegan escalonadas a lo largo de --rampa segundos, como una clase que entra
+    async def con_retraso(i):
+        await asyncio.sleep(args.rampa * i / max(1, args.sesiones))
+        await _sesion_servidor(url, paso, args.acciones, args.pausa, random.Random(args.semilla + i), resultados)
+    await asyncio.gather(*(con_retraso(i) for i in range(args.sesiones)))
+
+
+def probar_servidor(app, args):
+    script, paso = GUIONES[app]
+    puerto = puerto_libre()
+    servidor = arrancar_servidor(script, puerto)
+    try:
+        resultados = Resultados()
+        vigilante = VigilanteMemoria(servidor.pid)
+        inicio = time.perf_counter()
+        asyncio.run(_lanzar_sesiones(f"ws://127.0.0.1:{puerto}/_stcore/stream", paso, args, resultados))
+        duracion = time.perf_counter() - inicio
+        return resultados.resumen(duracion, vigilante.inicial, vigilante.detener())
+    finally:
+        servidor.terminate()
+        servidor.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", choices=sorted(GUIONES) + ["todas"], default="todas")
+    parser.add_argument("--modo", choices=("servidor", "apptest"), default="servidor")
+    parser.add_argument("--sesiones", type=int, default=100)
+    parser.add_argument("--acciones", type=int, default=10, help="reruns por sesión tras el primero")
+    parser.add_argument("--rampa", type=float, default=2.0, help="segundos en que se conectan todas (servidor)")
+    parser.add_argument("--pausa", type=float, default=0.0, help="segundos medios entre acciones (servidor)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--max-p95", type=float, help="límite de latencia p95 en ms")
+    parser.add_argument("--max-p99", type=float, help="límite de latencia p99 en ms")
+    parser.add_argument("--min-reruns-s", type=float, help="mínimo de reruns por segundo")
+    parser.add_argument("--max-estado", type=float, help="límite de session_state por sesión en KiB (apptest)")
+    parser.add_argument("--max-rss", type=float, help="límite de memoria residente en MiB")
+    args = parser.parse_args()
+
+    if args.modo == "apptest":
+        import matplotlib
+        matplotlib.use("Agg")
+    probar = probar_apptest if args.modo == "apptest" else probar_servidor
+
+    # (métrica, límite, True si el límite es un máximo)
+    limites = [
+        ("p95_ms", args.max_p95, True),
+        ("p99_ms", args.max_p99, True),
+        ("reruns_por_s", args.min_reruns_s, False),
+        ("estado_max_kib", args.max_estado, True),
+        ("rss_pico_mib", args.max_rss, True),
+    ]
+    fallos = []
+    for app in sorted(GUIONES) if args.app == "todas" else [args.app]:
+        r = probar(app, args)
+        print(f"{app:18s} {args.sesiones} sesiones x {args.acciones + 1} reruns (modo {args.modo})")
+        print(f"    latencia  p50 {r['p50_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms  p99 {r['p99_ms']:8.1f} ms")
+        print(f"    ritmo     {r['reruns_por_s']:8.1f} reruns/s")
+        if r["deltas_por_rerun"] is not None:
+            print(f"    deltas    {r['deltas_por_rerun']:8.1f} por interacción")
+        if r["estado_max_kib"] is not None:
+            print(f"    estado    medio {r['estado_medio_kib']:8.1f} KiB  máx {r['estado_max_kib']:8.1f} KiB")
+        print(f"    memoria   RSS {r['rss_inicial_mib']:8.1f} -> pico {r['rss_pico_mib']:8.1f} MiB")
+        if r["errores"]:
+            print(f"    errores   {len(r['errores'])} sesiones, p. ej.: {r['errores'][0]}")
+            fallos.append(f"{app}: {len(r['errores'])} sesiones con error")
+        for metrica, limite, es_maximo in limites:
+            if limite is None or r[metrica] is None:
+                continue
+            if (r[metrica] > limite) if es_maximo else (r[metrica] < limite):
+                fallos.append(f"{app}: {metrica} = {r[metrica]:.1f} (límite {limite})")
+
+    if fallos:
+        print("Límites superados:")
+        for fallo in fallos:
+            print(f"  {fallo}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
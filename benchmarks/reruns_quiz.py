@@ -0,0 +1,99 @@
+"""
+Cuenta las ejecuciones del script por cada clic en los juegos de preguntas.
+
+Recorre cada juego con AppTest (sin servidor ni navegador): pide una pregunta,
+fuerza un rerun sin tocar nada (las opciones deben seguir iguales y en el mismo
+orden) y contesta. Las ejecuciones se cuentan en la llamada a
+metricas.empezar_interaccion con la que empieza cada juego, así que un
+st.rerun() dentro del script cuenta como una ejecución más. Cada clic debería
+costar exactamente una ejecución del script; sale con código 1 si no es así, si
+las opciones cambian entre reruns o si alguna respuesta se pierde.
+
+Uso: python benchmarks/reruns_quiz.py [--preguntas 20]
+"""
+import argparse
+import os
+import random
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ["VISUALIZADOR_CACHE_DISCO"] = "0"
+
+JUEGOS = ("juego_sonido.py", "juego_partes_oido.py")
+
+
+def opciones(at):
+    return [(boton.key, boton.label) for boton in at.button if (boton.key or "").startswith("op_")]
+
+
+def recorrer(juego, preguntas, azar):
+    """Devuelve (ejecuciones por clic, preguntas cuyas opciones cambiaron, respuestas perdidas)."""
+    import metricas
+    from streamlit.testing.v1 import AppTest
+
+    nombre = os.path.splitext(juego)[0]
+    contador = [0]
+    empezar = metricas.empezar_interaccion
+
+    def contar(interaccion):
+        if interaccion == nombre:
+            contador[0] += 1
+        empezar(interaccion)
+
+    def pulsar(boton):
+        antes = contador[0]
+        boton.click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return contador[0] - antes
+
+    ejecuciones = []
+    inestables = perdidas = 0
+    metricas.empezar_interaccion = contar
+    try:
+        at = AppTest.from_file(os.path.join(RAIZ, juego), default_timeout=30)
+        at.run()
+        for _ in range(preguntas):
+            siguiente = next((boton for boton in at.button if not (boton.key or "").startswith("op_")), None)
+            if siguiente is None:
+                # La pregunta sigue abierta: el clic en la respuesta anterior no llegó a contar
+                perdidas += 1
+                at.run()
+                continue
+            ejecuciones.append(pulsar(siguiente))
+            antes = opciones(at)
+
+            at.run() # p. ej. otra pestaña o un widget ajeno a la pregunta
+            if opciones(at) != antes:
+                inestables += 1
+
+            clave = antes[azar.randrange(len(antes))][0]
+            ejecuciones.append(pulsar(at.button(key=clave)))
+    finally:
+        metricas.empezar_interaccion = empezar
+    return ejecuciones, inestables, perdidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preguntas", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    fallos = []
+    for juego in JUEGOS:
+        ejecuciones, inestables, perdidas = recorrer(juego, args.preguntas, random.Random(args.semilla))
+        por_pregunta = sum(ejecuciones) / args.preguntas
+        print(f"{juego:22s} {args.preguntas} preguntas: {por_pregunta:.2f} ejecuciones por pregunta contestada "
+              f"(máx. {max(ejecuciones)} por clic), opciones cambiadas en {inestables}, respuestas perdidas {perdidas}")
+        if max(ejecuciones) > 1 or inestables or perdidas:
+            fallos.append(juego)
+
+    if fallos:
+        print(f"Más de una ejecución por clic, opciones inestables o respuestas perdidas en: {', '.join(fallos)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Suite de benchmarks: tiempo y memoria de cada etapa del visualizador.
+
+Mide la síntesis, la codificación WAV, el dibujo con Agg y los reruns
+completos de las apps de Streamlit (con AppTest, sin navegador ni tarjeta de
+sonido). Los resultados se guardan en JSON para comparar entre commits.
+
+Uso:
+    python benchmarks/suite.py --salida resultados.json
+    python benchmarks/suite.py --comparar base.json --tolerancia 0.25
+    python benchmarks/suite.py --solo sintesis wav
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# Las etapas "sin caché" deben sintetizar de verdad: nada de lo que haya en disco
+os.environ["VISUALIZADOR_CACHE_DISCO"] = "0"
+
+ETAPAS = {}
+
+
+def etapa(nombre, repeticiones=30):
+    """Registra una etapa. La función recibe nada y devuelve un callable a medir."""
+    def registrar(preparar):
+        ETAPAS[nombre] = (preparar, repeticiones)
+        return preparar
+    return registrar
+
+
+# --- Etapas ---
+
+@etapa("sintesis")
+def _sintesis():
+    from sintesis import onda_audio
+    return lambda: onda_audio(440.0, 0.8, 3.0, True)
+
+
+@etapa("timbre_64_armonicos")
+def _timbre_64_armonicos():
+    import numpy as np
+    from sintesis import SAMPLE_RATE, onda_audio
+    # Diente de sierra a 100 Hz: los 64 armónicos caen por debajo de Nyquist
+    out = np.empty(3 * SAMPLE_RATE, dtype=np.float32)
+    return lambda: onda_audio(100.0, 0.8, 3.0, out=out, timbre="Diente de sierra")
+
+
+@etapa("wav")
+def _wav():
+    import numpy as np
+    from audio_web import codificar_wav
+    from sintesis import onda_audio
+    # Sin caché: síntesis en int16 + empaquetado, como un fallo de caché de play_sound
+    return lambda: codificar_wav(onda_audio(440.0, 0.7, 1.0, dtype=np.int16))
+
+
+@etapa("wav_cacheado", repeticiones=200)
+def _wav_cacheado():
+    from audio_web import clip_wav
+    clip_wav(440.0, 0.7, 1.0)
+    return lambda: clip_wav(440.0, 0.7, 1.0)
+
+
+def _comprobar_mulaw():
+    """codificar_mulaw debe dar lo mismo que la referencia (audioop, hasta Python 3.12) en las 65536 muestras."""
+    import warnings
+    import numpy as np
+    from audio_web import codificar_mulaw
+    from sintesis import ESCALA_16BIT
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            import audioop
+        except ImportError:
+            return
+    muestras = np.arange(-32768, 32768, dtype=np.int32)
+    referencia = np.frombuffer(audioop.lin2ulaw(muestras.astype(np.int16).tobytes(), 2), dtype=np.uint8)
+    distintas = np.count_nonzero(codificar_mulaw((muestras / ESCALA_16BIT).astype(np.float32)) != referencia)
+    if distintas:
+        raise RuntimeError(f"codificar_mulaw difiere de audioop.lin2ulaw en {distintas} muestras")
+
+
+@etapa("audio_compacto")
+def _audio_compacto():
+    from audio_web import cache_clips, clip_compacto
+    _comprobar_mulaw()
+    # Elección y codificación del formato más pequeño, siempre sin caché
+    def codificar():
+        cache_clips.limpiar()
+        return clip_compacto(440.0, 0.7, 1.0)
+    return codificar
+
+
+@etapa("clip_desde_disco", repeticiones=200)
+def _clip_desde_disco():
+    import tempfile
+    from audio_web import _desempaquetar, _empaquetar, clip_compacto
+    from cache_disco import CacheDisco
+    # Lo que hace otra réplica (o un reinicio) con la memoria vacía: leer el clip con mmap
+    disco = CacheDisco(tempfile.mkdtemp())
+    clave = ("compacto", 440.0, 0.7, 1.0)
+    disco.guardar(clave, _empaquetar(clip_compacto(440.0, 0.7, 1.0)))
+    return lambda: _desempaquetar(disco.leer(clave))
+
+
+@etapa("voces_48")
+def _voces_48():
+    import numpy as np
+    from sintesis import SAMPLE_RATE, onda_voces
+    # Un acorde de 48 voces de 3 s: tabla de senos + un producto matriz-vector por bloque
+    voces = [(110.0 * 2 ** (i / 12), 0.02, 7.5 * i) for i in range(48)]
+    out = np.empty(3 * SAMPLE_RATE, dtype=np.float32)
+    return lambda: onda_voces(voces, 3.0, out=out)
+
+
+@etapa("voces_grafico_trazas", repeticiones=20)
+def _voces_grafico_trazas():
+    from decimacion import voces_para_grafico
+    # Lo que calcula el hilo trabajador de AppOndas con "Mostrar cada voz"
+    voces = [(5.0 + i, 0.05, 15.0 * i) for i in range(16)]
+    return lambda: voces_para_grafico(voces, 3.0, 640, por_voz=True)
+
+
+@etapa("exportacion_60s", repeticiones=10)
+def _exportacion_60s():
+    import tempfile
+    from exportacion import exportar_tono
+    from scipy.io import wavfile
+    ruta = os.path.join(tempfile.mkdtemp(), "tono.wav")
+    # Un tono más corto que dos fundidos también tiene que sonar
+    for duracion in (0.002, 0.005, 0.02):
+        exportar_tono(ruta, 440.0, 0.8, duracion)
+        if not wavfile.read(ruta)[1].any():
+            raise RuntimeError(f"la exportación de {duracion} s es silencio")
+    # Escritura por bloques de un minuto de audio con timbre, directamente a disco
+    return lambda: exportar_tono(ruta, 440.0, 0.8, 60.0, timbre="Violín")
+
+
+@etapa("lote_preguntas")
+def _lote_preguntas():
+    from audio_web import cache_clips, clips_compactos
+    from preguntas import PREGUNTAS_ADELANTADAS
+    # Lo que hace el hilo de PreparadorPreguntas al rellenar la cola entera, sin caché
+    tonos = [(150.0 + 80 * i, 0.7) for i in range(PREGUNTAS_ADELANTADAS)]
+
+    def preparar():
+        cache_clips.limpiar()
+        return clips_compactos(tonos, 1.0)
+    return preparar
+
+
+@etapa("agg_app_ondas", repeticiones=20)
+def _agg_app_ondas():
+    # Igual que actualizar_onda_visual con un dibujo completo, pero sin Tk
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from decimacion import onda_para_grafico
+    from graficos import estilizar_ejes
+
+    fig = Figure(figsize=(5, 4), dpi=100)
+    lienzo = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+    estilizar_ejes(ax)
+    linea, = ax.plot([], [], linewidth=2)
+
+    def dibujar():
+        tiempo, onda = onda_para_grafico(440.0, 0.8, 3.0, True, int(ax.bbox.width))
+        linea.set_data(tiempo, onda)
+        ax.set_xlim(0, 3.0)
+        lienzo.draw()
+    return dibujar
+
+
+@etapa("agg_web_png", repeticiones=20)
+def _agg_web_png():
+    from decimacion import onda_para_grafico
+    from graficos import columnas_png, png_onda
+
+    def dibujar():
+        tiempo, onda = onda_para_grafico(440.0, 0.8, 3.0, True, columnas_png())
+        return png_onda(tiempo, onda, "Onda Compleja", 3.0)
+    return dibujar
+
+
+def _app(script):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(RAIZ, script), default_timeout=30)
+
+
+def _comprobar(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+@etapa("rerun_ondas_web", repeticiones=20)
+def _rerun_ondas_web():
+    at = _app("ondas_web.py")
+    at.run()
+    valores = iter(range(10**9))
+
+    def rerun():
+        # Un valor nuevo cada vez para que la imagen no salga de la caché
+        at.slider[2].set_value(0.1 + (next(valores) % 290) / 100)
+        at.run()
+        _comprobar(at)
+    return rerun
+
+
+@etapa("rerun_juego_sonido", repeticiones=20)
+def _rerun_juego_sonido():
+    at = _app("juego_sonido.py")
+    at.run()
+
+    def rerun():
+        at.button[0].click().run() # Empezar / Siguiente Sonido
+        _comprobar(at)
+        at.button[1].click().run() # Responder (vuelve a la pantalla inicial)
+        _comprobar(at)
+    return rerun
+
+
+@etapa("rerun_juego_partes_oido", repeticiones=20)
+def _rerun_juego_partes_oido():
+    at = _app("juego_partes_oido.py")
+    at.run()
+
+    def rerun():
+        at.button[0].click().run() # Empezar / Siguiente Pregunta
+        _comprobar(at)
+        at.button[0].click().run() # Primera opción
+        _comprobar(at)
+    return rerun
+
+
+# --- Medición ---
+
+def medir(preparar, repeticiones):
+    funcion = preparar()
+    funcion() # calentamiento
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "mediana_ms": statistics.median(tiempos),
+        "p95_ms": tiempos[min(len(tiempos) - 1, int(0.95 * len(tiempos)))],
+        "min_ms": tiempos[0],
+        "pico_memoria_kib": pico / 1024,
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, base, tolerancia):
+    """Imprime la relación con `base` y devuelve las etapas que empeoran más de `tolerancia`."""
+    regresiones = []
+    for nombre, datos in actual["etapas"].items():
+        anterior = base["etapas"].get(nombre, {})
+        if "mediana_ms" not in datos or "mediana_ms" not in anterior:
+            continue
+        relacion = datos["mediana_ms"] / anterior["mediana_ms"]
+        marca = "  <-- regresión" if relacion > 1 + tolerancia else ""
+        print(f"  {nombre:26s} {anterior['mediana_ms']:9.3f} -> {datos['mediana_ms']:9.3f} ms  x{relacion:5.2f}{marca}")
+        if marca:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="empeoramiento relativo admitido")
+    parser.add_argument("--solo", nargs="*", choices=sorted(ETAPAS), help="etapas a medir")
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplica las repeticiones")
+    args = parser.parse_args()
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    resultados = {
+        "commit": commit_actual(),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "etapas": {},
+    }
+    for nombre in args.solo or ETAPAS:
+        preparar, repeticiones = ETAPAS[nombre]
+        try:
+            datos = medir(preparar, max(1, int(repeticiones * args.escala)))
+            print(f"{nombre:26s} mediana {datos['mediana_ms']:9.3f} ms  p95 {datos['p95_ms']:9.3f} ms  "
+                  f"pico {datos['pico_memoria_kib']:9.1f} KiB")
+        except Exception as error: # una etapa rota no debe impedir medir las demás
+            datos = {"error": f"{type(error).__name__}: {error}"}
+            print(f"{nombre:26s} ERROR {datos['error']}")
+        resultados["etapas"][nombre] = datos
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        print(f"Comparación con {base.get('commit')}:")
+        if comparar(resultados, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Tiempo hasta el sonido a la frecuencia de muestreo del dispositivo o del cliente.
+
+Compara lo de antes (sintetizar siempre a 44100 Hz y remuestrear, con el filtro
+diseñado en cada llamada) con lo de ahora (sintetizar directamente a la
+frecuencia pedida, y el filtro cacheado cuando hace falta remuestrear). Si hay
+dispositivo de audio, mide también cuánto tarda en llegar el primer bloque al
+abrir el flujo a 44100 Hz y a su frecuencia nativa.
+
+Uso: python benchmarks/tiempo_hasta_sonido.py [--destino 48000] [--repeticiones 50]
+"""
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.environ["VISUALIZADOR_CACHE_DISCO"] = "0" # medir la síntesis, no lo que dejó otra ejecución
+
+
+def medir(funcion, repeticiones):
+    """Mediana en milisegundos de `repeticiones` llamadas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2]
+
+
+def primer_bloque(sample_rate):
+    """Milisegundos desde `reproducir` hasta que el callback entrega el primer bloque."""
+    from motor_audio import MotorAudio
+    motor = MotorAudio(sample_rate=sample_rate)
+    listo = threading.Event()
+    motor.monitor = lambda bloque: listo.set()
+    motor.actualizar(440.0, 0.0)
+    inicio = time.perf_counter()
+    motor.reproducir(0.2)
+    listo.wait(2.0)
+    transcurrido = (time.perf_counter() - inicio) * 1000
+    motor.cerrar()
+    return transcurrido, motor.sample_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--destino", type=int, default=48000, help="frecuencia del dispositivo o del cliente")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--duracion", type=float, default=1.0)
+    args = parser.parse_args()
+
+    import numpy as np
+    from scipy.signal import resample_poly
+    import audio_web
+    from audio_web import clip_compacto, remuestrear
+    from sintesis import SAMPLE_RATE, onda_audio
+
+    destino, duracion, n = args.destino, args.duracion, args.repeticiones
+    divisor = math.gcd(SAMPLE_RATE, destino)
+    arriba, abajo = destino // divisor, SAMPLE_RATE // divisor
+
+    def antes_onda():
+        onda = onda_audio(440.0, 0.7, duracion)
+        return resample_poly(onda, arriba, abajo).astype(np.float32)
+
+    def ahora_onda():
+        return onda_audio(440.0, 0.7, duracion, sample_rate=destino)
+
+    def clip(sample_rate):
+        def generar():
+            audio_web.cache_clips.limpiar()
+            return clip_compacto(440.0, 0.7, duracion, sample_rate=sample_rate)
+        return generar
+
+    onda = onda_audio(2000.0, 0.7, duracion)
+    remuestrear(onda, SAMPLE_RATE, destino) # el filtro queda cacheado
+    filas = [
+        ("onda a 44100 + resample_poly", antes_onda),
+        (f"onda sintetizada a {destino}", ahora_onda),
+        ("resample_poly (filtro nuevo)", lambda: resample_poly(onda, arriba, abajo)),
+        ("remuestrear (filtro cacheado)", lambda: remuestrear(onda, SAMPLE_RATE, destino)),
+        ("clip_compacto a 44100", clip(SAMPLE_RATE)),
+        (f"clip_compacto a {destino}", clip(destino)),
+    ]
+    print(f"{duracion:g} s de tono, {SAMPLE_RATE} -> {destino} Hz, mediana de {n}")
+    for nombre, funcion in filas:
+        print(f"  {nombre:32s} {medir(funcion, n):8.2f} ms")
+
+    try:
+        import sounddevice # noqa: F401
+        from motor_audio import tasa_nativa
+        nativa = tasa_nativa()
+        for sample_rate in (SAMPLE_RATE, nativa):
+            ms, real = primer_bloque(sample_rate)
+            print(f"  primer bloque a {real:6d} Hz        {ms:8.2f} ms")
+    except Exception as error: # sin PortAudio o sin dispositivo de salida
+        print(f"  (sin dispositivo de audio: {error})")
+
+
+if __name__ == "__main__":
+    main()
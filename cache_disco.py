@@ -0,0 +1,167 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+
+from archivos import escribir_atomico
+
+# --- Configuración de la caché en disco ---
+# Carpeta compartida por todos los procesos (réplicas de Streamlit, reinicios...);
+# VISUALIZADOR_CACHE_DISCO=0 la desactiva
+DIRECTORIO_CACHE = os.environ.get("VISUALIZADOR_CACHE_DISCO",
+                                  os.path.join(tempfile.gettempdir(), "visualizador-ondas"))
+CACHE_DISCO_MAX_BYTES = int(os.environ.get("VISUALIZADOR_CACHE_DISCO_MAX_MB", "256")) * 1024 * 1024
+# Forma parte de todas las claves: hay que subirla si cambia lo que se genera
+# para unos mismos parámetros (síntesis, codificación, estilo de los gráficos...)
+VERSION_CACHE = 1
+EXTENSION = ".bin"
+
+
+def huella(clave):
+    """Nombre del archivo de `clave`: SHA-256 de su repr, igual en todos los procesos."""
+    return hashlib.sha256(repr((VERSION_CACHE, clave)).encode("utf-8")).hexdigest()
+
+
+class CacheDisco:
+    """
+    Caché de bytes en disco, direccionada por contenido y compartida entre procesos.
+
+    Cada valor se guarda en `<directorio>/<2 primeras cifras>/<sha256>.bin`. Las
+    escrituras van a un temporal que se renombra, así que otro proceso nunca lee
+    un archivo a medias y dos procesos que generan a la vez la misma clave
+    simplemente escriben lo mismo. Las lecturas se hacen con `mmap`: lo que se
+    devuelve es una vista de solo lectura de la caché de páginas del sistema,
+    sin copias. La fecha de modificación hace de marca de último uso para
+    expulsar los archivos menos usados cuando se supera `max_bytes`.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, max_bytes=CACHE_DISCO_MAX_BYTES):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._bytes = None # estimación de lo ocupado; se recalcula al recortar
+
+    def ruta(self, clave):
+        nombre = huella(clave)
+        return os.path.join(self.directorio, nombre[:2], nombre + EXTENSION)
+
+    def leer(self, clave):
+        """Vista (memoryview) del valor guardado, o None si no está."""
+        ruta = self.ruta(clave)
+        try:
+            with open(ruta, "rb") as f:
+                mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(ruta) # último uso, para el LRU
+        except (OSError, ValueError): # no está, o lo expulsó otro proceso; ValueError: vacío
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return memoryview(mapa)
+
+    def guardar(self, clave, datos):
+        """Guarda `datos` para `clave`; si el disco falla, simplemente no se guarda."""
+        if not datos or len(datos) > self.max_bytes:
+            return
+        try:
+            self._escribir(clave, datos)
+        except OSError:
+            pass # disco lleno o sin permisos: se sigue sirviendo desde memoria
+
+    def _escribir(self, clave, datos):
+        ruta = self.ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        try:
+            anterior = os.path.getsize(ruta) # al sobrescribir solo cuenta la diferencia
+        except OSError:
+            anterior = 0
+        escribir_atomico(ruta, datos)
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._ocupado()
+            else:
+                self._bytes += len(datos) - anterior
+            excedido = self._bytes > self.max_bytes
+        if excedido:
+            self.recortar()
+
+    def obtener(self, clave, generar):
+        """
+        Devuelve el valor de `clave` (bytes o una vista sobre el archivo),
+        llamando a `generar()` y guardando el resultado solo si no está en disco.
+        """
+        guardado = self.leer(clave)
+        if guardado is not None:
+            return guardado
+        datos = generar()
+        self.guardar(clave, datos)
+        return datos
+
+    def _archivos(self):
+        """[(último uso, bytes, ruta)] de todo lo guardado, incluido lo de otros procesos."""
+        archivos = []
+        try:
+            subdirectorios = list(os.scandir(self.directorio))
+        except FileNotFoundError:
+            return archivos
+        for subdirectorio in subdirectorios:
+            if not subdirectorio.is_dir():
+                continue
+            for entrada in os.scandir(subdirectorio.path):
+                if entrada.name.endswith(EXTENSION):
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    archivos.append((info.st_mtime, info.st_size, entrada.path))
+        return archivos
+
+    def _ocupado(self):
+        return sum(tamano for _, tamano, _ in self._archivos())
+
+    def recortar(self, objetivo=0.9):
+        """Borra los archivos menos usados hasta quedar por debajo de `objetivo` · max_bytes."""
+        with self._lock:
+            archivos = sorted(self._archivos())
+            total = sum(tamano for _, tamano, _ in archivos)
+            for _, tamano, ruta in archivos:
+                if total <= objetivo * self.max_bytes:
+                    break
+                try:
+                    os.unlink(ruta)
+                except OSError: # ya lo borró otro proceso (o, en Windows, está abierto)
+                    pass
+                total -= tamano
+            self._bytes = total
+
+    def estadisticas(self):
+        archivos = self._archivos()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "ratio": self.hits / total if total else 0.0,
+            "entradas": len(archivos),
+            "bytes": sum(tamano for _, tamano, _ in archivos),
+        }
+
+
+class _SinCache:
+    """Sustituto cuando la caché en disco está desactivada: nunca guarda nada."""
+
+    def leer(self, clave):
+        return None
+
+    def guardar(self, clave, datos):
+        pass
+
+    def obtener(self, clave, generar):
+        return generar()
+
+
+# Caché única del proceso; la carpeta la comparten todos los procesos
+cache_disco = CacheDisco() if DIRECTORIO_CACHE not in ("", "0") else _SinCache()
@@ -0,0 +1,85 @@
+import numpy as np
+
+from metricas import tramo
+from sintesis import ELEMENTOS_BLOQUE_VOCES, SAMPLE_RATE, bloques_voces, generar_onda, muestras_audio
+
+
+def envolvente_minmax(onda, columnas, duracion):
+    """
+    Reduce `onda` a como mucho 2 puntos por columna de píxeles: el mínimo y el máximo.
+
+    Devuelve (tiempo, valores). A diferencia de tomar puntos equiespaciados, los
+    picos se conservan siempre, así que una frecuencia alta se ve como una banda
+    llena en lugar de un dibujo falso por aliasing. Si hay pocas muestras se
+    devuelven tal cual.
+    """
+    n = onda.size
+    if n <= 2 * columnas:
+        return np.linspace(0, duracion, n, endpoint=False), onda
+
+    bordes = np.linspace(0, n, columnas + 1).astype(np.intp)[:-1]
+    resultado = np.empty(2 * columnas, dtype=onda.dtype)
+    np.minimum.reduceat(onda, bordes, out=resultado[0::2])
+    np.maximum.reduceat(onda, bordes, out=resultado[1::2])
+
+    # Ambos puntos de una columna comparten la X del centro de la columna
+    tiempo = np.repeat((bordes + n / (2 * columnas)) * (duracion / n), 2)
+    return tiempo, resultado
+
+
+def onda_para_grafico(frecuencia, amplitud, duracion, es_compleja=False, columnas=800, sample_rate=SAMPLE_RATE, timbre=None):
+    """
+    Sintetiza la señal real a `sample_rate` y la reduce al ancho del gráfico.
+
+    El número de puntos que llega a `ax.plot` depende solo de `columnas`, no de
+    la duración ni de la frecuencia.
+    """
+    n = muestras_audio(duracion, sample_rate)
+    with tramo("sintesis"):
+        onda = generar_onda(frecuencia, amplitud, n, 1 / sample_rate, es_compleja, timbre=timbre)
+    with tramo("decimacion"):
+        return envolvente_minmax(onda, columnas, duracion)
+
+
+def voces_para_grafico(voces, duracion, columnas=800, por_voz=False, sample_rate=SAMPLE_RATE):
+    """
+    Mezcla de `voces` [(frecuencia, amplitud, fase en grados)] reducida al ancho del gráfico.
+
+    Devuelve (tiempo, mezcla, trazas): `trazas` es, con `por_voz`, un array
+    (voces, puntos) con la envolvente de cada voz por separado para dibujarlas
+    como líneas finas (si no, None). Los bloques de síntesis abarcan columnas
+    enteras, así que el mínimo y el máximo se sacan bloque a bloque y la
+    señal completa nunca está en memoria.
+    """
+    n = muestras_audio(duracion, sample_rate)
+    paso = 1 / sample_rate
+    n_voces = len(voces)
+    if n <= 2 * columnas:
+        # Pocas muestras: se devuelven tal cual
+        mezcla = np.zeros(n, dtype=np.float32)
+        trazas = np.zeros((n_voces, n), dtype=np.float32) if por_voz else None
+        with tramo("sintesis"):
+            for inicio, fin, _, matriz in bloques_voces(voces, n, paso, por_voz=por_voz, out=mezcla):
+                if por_voz:
+                    trazas[:, inicio:fin] = matriz
+        return np.linspace(0, duracion, n, endpoint=False), mezcla, trazas
+
+    bordes = np.linspace(0, n, columnas + 1).astype(np.intp)
+    por_bloque = max(1, ELEMENTOS_BLOQUE_VOCES // (max(1, n_voces) * -(-n // columnas)))
+    cortes = np.append(bordes[:-1:por_bloque], n)
+    mezcla = np.zeros(2 * columnas, dtype=np.float32)
+    trazas = np.zeros((n_voces, 2 * columnas), dtype=np.float32) if por_voz else None
+    with tramo("sintesis"):
+        for bloque, (inicio, _, suma, matriz) in enumerate(bloques_voces(voces, n, paso, cortes, por_voz)):
+            primera = bloque * por_bloque
+            ultima = min(primera + por_bloque, columnas)
+            locales = bordes[primera:ultima] - inicio
+            np.minimum.reduceat(suma, locales, out=mezcla[2 * primera:2 * ultima:2])
+            np.maximum.reduceat(suma, locales, out=mezcla[2 * primera + 1:2 * ultima:2])
+            if por_voz:
+                np.minimum.reduceat(matriz, locales, axis=1, out=trazas[:, 2 * primera:2 * ultima:2])
+                np.maximum.reduceat(matriz, locales, axis=1, out=trazas[:, 2 * primera + 1:2 * ultima:2])
+
+    # Igual que en envolvente_minmax: los dos puntos de cada columna en su centro
+    tiempo = np.repeat((bordes[:-1] + n / (2 * columnas)) * (duracion / n), 2)
+    return tiempo, mezcla, trazas
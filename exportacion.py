@@ -0,0 +1,104 @@
+import numpy as np
+
+from audio_web import TAMANO_CABECERA_WAV, cabecera_wav
+from metricas import tramo
+from sintesis import ESCALA_16BIT, SAMPLE_RATE, Oscilador, OsciladorVoces, muestras_audio, parametros_voces
+
+# --- Configuración de la exportación ---
+BLOQUE_EXPORTACION = 1 << 16 # muestras por bloque: ~1,5 s a 44,1 kHz, 384 KiB de búferes
+FUNDIDO_EXPORTACION = 512 # muestras de la rampa de volumen al principio y al final (~12 ms)
+MAX_BYTES_WAV = 0xFFFFFFFF - 36 # los tamaños de la cabecera RIFF son de 32 bits
+
+
+class EscritorWAV:
+    """
+    Escribe un WAV PCM de 16 bits mono por bloques, sin tener nunca el audio entero en memoria.
+
+    Al abrirlo se escribe una cabecera provisional; `cerrar` vuelve al principio
+    y la corrige con el tamaño real de los datos. Se usa con `with`.
+    """
+
+    def __init__(self, ruta, sample_rate=SAMPLE_RATE):
+        self.ruta = ruta
+        self.sample_rate = sample_rate
+        self.bytes_datos = 0
+        self.archivo = open(ruta, "wb")
+        self.archivo.write(cabecera_wav(bytearray(TAMANO_CABECERA_WAV), 0, sample_rate))
+
+    def escribir(self, muestras):
+        """Añade un bloque de muestras int16 (se escribe desde su memoria, sin copiarlo)."""
+        bytes_bloque = muestras.size * muestras.itemsize
+        if self.bytes_datos + bytes_bloque > MAX_BYTES_WAV:
+            raise ValueError("El WAV superaría los 4 GiB que admite su cabecera")
+        self.archivo.write(memoryview(muestras).cast("B"))
+        self.bytes_datos += bytes_bloque
+
+    def cerrar(self):
+        if self.archivo.closed:
+            return
+        self.archivo.seek(0)
+        self.archivo.write(cabecera_wav(bytearray(TAMANO_CABECERA_WAV), self.bytes_datos, self.sample_rate))
+        self.archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+        return False
+
+
+def exportar_tono(ruta, frecuencia, amplitud, duracion, es_compleja=False, timbre=None,
+                  sample_rate=SAMPLE_RATE, bloque=BLOQUE_EXPORTACION, progreso=None, voces=None):
+    """
+    Escribe en `ruta` un tono de `duracion` segundos, de cualquier longitud.
+
+    Un `Oscilador` genera bloques de tamaño fijo con la fase continua y cada
+    bloque se convierte a int16 en un búfer reutilizado, así que la memoria no
+    depende de la duración. Como al reproducir, el archivo empieza y acaba con
+    una rampa de volumen corta (FUNDIDO_EXPORTACION muestras, o la mitad del
+    tono si es más corto) para que no haya chasquidos. `progreso(fraccion)` se llama después de cada bloque. Con
+    `voces` [(frecuencia, amplitud, fase en grados)] se escribe su mezcla
+    (con un `OsciladorVoces`) en lugar del tono.
+    Devuelve el número de muestras escritas.
+    """
+    total = muestras_audio(duracion, sample_rate)
+    if total * 2 > MAX_BYTES_WAV:
+        raise ValueError(f"{duracion} s no caben en un WAV de 16 bits a {sample_rate} Hz")
+    if voces:
+        frecuencias, amplitudes, fases = parametros_voces(voces)
+        silencio = np.zeros_like(amplitudes)
+        oscilador = OsciladorVoces(sample_rate, bloque)
+    else:
+        oscilador = Oscilador(sample_rate, bloque)
+    onda = np.empty(bloque, dtype=np.float32)
+    muestras = np.empty(bloque, dtype=np.int16)
+
+    # En tonos muy cortos el fundido se acorta para que la subida y la bajada
+    # tengan cada una su bloque; si no, el primero sería también el último y
+    # la rampa iría de 0 a 0 (todo silencio)
+    fundido = max(1, min(FUNDIDO_EXPORTACION, total // 2))
+
+    with tramo("exportacion"), EscritorWAV(ruta, sample_rate) as escritor:
+        escritas = 0
+        while escritas < total:
+            # Bloques cortos al principio y al final: el oscilador reparte el
+            # cambio de volumen a lo largo de todo el bloque que rellena
+            restantes = total - escritas
+            if escritas == 0:
+                n = min(fundido, restantes)
+            elif restantes > fundido:
+                n = min(bloque, restantes - fundido)
+            else:
+                n = restantes
+            final = escritas + n >= total
+            if voces:
+                oscilador.llenar(onda[:n], frecuencias, silencio if final else amplitudes, fases)
+            else:
+                oscilador.llenar(onda[:n], frecuencia, 0.0 if final else amplitud, es_compleja, timbre)
+            np.multiply(onda[:n], ESCALA_16BIT, out=muestras[:n], casting="unsafe")
+            escritor.escribir(muestras[:n])
+            escritas += n
+            if progreso is not None:
+                progreso(escritas / total)
+    return escritas
@@ -0,0 +1,97 @@
+import io
+import threading
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from metricas import tramo
+
+# --- PALETA DE COLORES ---
+COLOR_FONDO = "#FFF5F2"
+COLOR_FONDO_GRAFICO = "#F5BABB"
+COLOR_ACENTO = "#568F87"
+COLOR_TEXTO = "#064232"
+
+DPI_PNG = 150
+
+
+def estilizar_ejes(ax):
+    """Aplica el estilo del visualizador a unos ejes (todo menos título y límites de X)."""
+    ax.set_facecolor(COLOR_FONDO_GRAFICO)
+    ax.set_xlabel("Tiempo (s)", color=COLOR_TEXTO)
+    ax.set_ylabel("Amplitud", color=COLOR_TEXTO)
+    ax.tick_params(colors=COLOR_TEXTO, which='both')
+    ax.set_ylim(-1.5, 1.5)
+    ax.grid(True, linestyle='--', alpha=0.6, color=COLOR_ACENTO)
+    for spine in ax.spines.values():
+        spine.set_edgecolor(COLOR_TEXTO)
+
+
+def mostrar_trazas(ax, lineas, tiempo, trazas, **estilo):
+    """
+    Una línea fina por fila de `trazas` (o ninguna si es None), por debajo de
+    la onda principal. Las líneas se reutilizan: `lineas` crece solo cuando
+    hay más voces que nunca y las que sobran se ocultan.
+    """
+    n = 0 if trazas is None else len(trazas)
+    while len(lineas) < n:
+        linea, = ax.plot([], [], color=COLOR_TEXTO, linewidth=0.8, alpha=0.45, zorder=1, **estilo)
+        lineas.append(linea)
+    for i, linea in enumerate(lineas):
+        if i < n:
+            linea.set_data(tiempo, trazas[i])
+        linea.set_visible(i < n)
+
+
+class RenderizadorOnda:
+    """
+    Figura de Agg reutilizable que dibuja una onda y la devuelve como PNG.
+
+    Usa la API orientada a objetos (`Figure` + `FigureCanvasAgg`), así que no
+    pasa por pyplot ni queda registrada en su lista global de figuras.
+    """
+
+    def __init__(self, figsize=(6.4, 4.8)):
+        self.fig = Figure(figsize=figsize, facecolor=COLOR_FONDO)
+        self.lienzo = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+        estilizar_ejes(self.ax)
+        self.linea, = self.ax.plot([], [], color=COLOR_ACENTO, linewidth=2)
+        self.lineas_voces = [] # líneas finas de cada voz, se crean al necesitarlas
+
+    def columnas(self, dpi=DPI_PNG):
+        """Ancho en píxeles del área de los ejes en el PNG."""
+        return int(self.ax.get_position().width * self.fig.get_figwidth() * dpi)
+
+    def png(self, tiempo, onda, titulo, duracion, trazas=None, dpi=DPI_PNG):
+        self.linea.set_data(tiempo, onda)
+        mostrar_trazas(self.ax, self.lineas_voces, tiempo, trazas)
+        self.ax.set_title(titulo, fontsize=14, color=COLOR_TEXTO)
+        self.ax.set_xlim(0, duracion)
+        buffer = io.BytesIO()
+        with tramo("render_agg"):
+            self.fig.savefig(buffer, format="png", dpi=dpi, facecolor=COLOR_FONDO)
+        return buffer.getvalue()
+
+
+# Una sola figura por proceso, protegida con un cerrojo: Streamlit ejecuta cada
+# rerun en un hilo nuevo, así que una figura por hilo no se reutilizaría nunca
+_renderizador = None
+_lock = threading.Lock()
+
+
+def _obtener_renderizador():
+    global _renderizador
+    if _renderizador is None:
+        _renderizador = RenderizadorOnda()
+    return _renderizador
+
+
+def columnas_png():
+    with _lock:
+        return _obtener_renderizador().columnas()
+
+
+def png_onda(tiempo, onda, titulo, duracion, trazas=None):
+    with _lock:
+        return _obtener_renderizador().png(tiempo, onda, titulo, duracion, trazas)
@@ -0,0 +1,56 @@
+import io
+import os
+
+from PIL import Image
+
+from archivos import escribir_atomico
+
+# --- Configuración de las variantes de imagen ---
+DIRECTORIO_ESTATICO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+URL_ESTATICA = "app/static" # Ruta con la que Streamlit sirve DIRECTORIO_ESTATICO
+ANCHOS_VARIANTES = {"miniatura": 320, "normal": 640, "retina": 1280} # px
+CALIDAD_JPEG = 85
+
+
+def generar_variantes(ruta_imagen, directorio=DIRECTORIO_ESTATICO):
+    """
+    Crea en `directorio` una copia JPEG de la imagen para cada ancho de ANCHOS_VARIANTES.
+
+    Nunca se amplía la imagen: los anchos mayores que el original se quedan en
+    el ancho original (y las variantes repetidas se omiten). Solo se regeneran
+    los archivos que falten o sean más antiguos que la imagen original.
+    Devuelve una lista de (nombre de archivo, ancho) ordenada por ancho.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    base = os.path.splitext(os.path.basename(ruta_imagen))[0]
+    modificada = os.path.getmtime(ruta_imagen)
+
+    with Image.open(ruta_imagen) as original:
+        original.load()
+        anchos = sorted({min(ancho, original.width) for ancho in ANCHOS_VARIANTES.values()})
+        variantes = []
+        for ancho in anchos:
+            nombre = f"{base}_{ancho}.jpg"
+            ruta = os.path.join(directorio, nombre)
+            if not os.path.exists(ruta) or os.path.getmtime(ruta) < modificada:
+                alto = round(original.height * ancho / original.width)
+                reducida = original if ancho == original.width else original.resize((ancho, alto), Image.LANCZOS)
+                buffer = io.BytesIO()
+                reducida.convert("RGB").save(buffer, format="JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+                escribir_atomico(ruta, buffer.getvalue())
+            variantes.append((nombre, ancho))
+    return variantes
+
+
+def html_imagen(variantes, texto_alternativo, pie=""):
+    """<img> con srcset: el navegador elige la variante según el ancho y la densidad de la pantalla."""
+    srcset = ", ".join(f"{URL_ESTATICA}/{nombre} {ancho}w" for nombre, ancho in variantes)
+    nombre_mayor, ancho_mayor = variantes[-1]
+    pie_html = f'<figcaption style="text-align:center; font-size:0.9rem;">{pie}</figcaption>' if pie else ""
+    return (
+        f'<figure style="margin:0;">'
+        f'<img src="{URL_ESTATICA}/{nombre_mayor}" srcset="{srcset}" '
+        f'sizes="(max-width: {ancho_mayor}px) 100vw, {ancho_mayor}px" '
+        f'alt="{texto_alternativo}" style="width:100%; max-width:{ancho_mayor}px; height:auto;">'
+        f'{pie_html}</figure>'
+    )
@@ -1,9 +1,14 @@
 import streamlit as st
+import metricas
+from metricas_web import panel_depuracion
 import random
 import os
+from motor_quiz import MotorQuiz
+from imagenes import ANCHOS_VARIANTES, DIRECTORIO_ESTATICO, generar_variantes, html_imagen
 
 # --- Configuración de la página ---
 st.set_page_config(page_title="Juego del Oído", layout="centered")
+metricas.empezar_interaccion("juego_partes_oido")
 
 # --- Estilos Personalizados ---
 COLOR_FONDO = "#FFF5F2"
@@ -37,64 +42,75 @@ PARTES_OIDO_CON_NUMEROS = {
 # Lista de todas las partes para generar opciones aleatorias
 TODAS_LAS_PARTES = ["Oído externo (Oreja)", "Conducto auditivo", "Tímpano", "Martillo", "Yunque", "Estribo", "Cóclea"]
 
-# --- Inicialización del estado del juego ---
-if 'current_question_num' not in st.session_state:
-    st.session_state.current_question_num = None
-    st.session_state.feedback = ""
+# *** LÍNEA CORREGIDA PARA EL NOMBRE DE ARCHIVO EN MINÚSCULAS ***
+image_path = "partes_oido.jpg"
+# ***************************************************************
+PIE_IMAGEN = "Identifica la parte del oído señalada"
+
+@st.cache_resource
+def cargar_imagen():
+    """
+    Prepara la imagen una sola vez por proceso: genera las variantes por ancho en
+    static/ y guarda en memoria la variante normal para cuando no hay archivos estáticos.
+    Si no se puede escribir en static/, se muestra la imagen original desde memoria.
+    """
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), image_path)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        variantes = generar_variantes(ruta)
+        nombre_normal = min(variantes, key=lambda v: abs(v[1] - ANCHOS_VARIANTES["normal"]))[0]
+        with open(os.path.join(DIRECTORIO_ESTATICO, nombre_normal), "rb") as f:
+            datos = f.read()
+    except OSError: # p. ej. un despliegue con el código en solo lectura
+        with open(ruta, "rb") as f:
+            return {"variantes": None, "bytes": f.read(), "estatico": False}
+    return {
+        "variantes": variantes,
+        "bytes": datos,
+        "estatico": st.get_option("server.enableStaticServing"),
+    }
+
+imagen = cargar_imagen()
 
 def generate_question():
-    """Genera una nueva pregunta eligiendo un número al azar de la imagen."""
+    """Elige un número al azar de la imagen y sus opciones (la correcta y 3 incorrectas)."""
     num_parte = random.choice(list(PARTES_OIDO_CON_NUMEROS.keys()))
-    st.session_state.current_question_num = num_parte
-    st.session_state.feedback = ""
-    st.rerun()
+    correct_answer = PARTES_OIDO_CON_NUMEROS[num_parte]
+    distractores = [p for p in TODAS_LAS_PARTES if p != correct_answer]
+    opciones = [correct_answer] + random.sample(distractores, min(3, len(distractores)))
+    random.shuffle(opciones)
+    return opciones, opciones.index(correct_answer), num_parte
 
-def check_answer(user_answer):
-    """Comprueba la respuesta del usuario."""
-    correct_answer = PARTES_OIDO_CON_NUMEROS[st.session_state.current_question_num]
-    if user_answer == correct_answer:
-        st.session_state.feedback = "¡Correcto! ✅"
-        st.success(st.session_state.feedback)
-        st.balloons()
-    else:
-        st.session_state.feedback = f"¡Incorrecto! ❌ La respuesta correcta para el número {st.session_state.current_question_num} es: **{correct_answer}**."
-        st.error(st.session_state.feedback)
-    st.session_state.current_question_num = None # Resetea la pregunta
+# Las opciones se sortean una vez por pregunta y se guardan en session_state
+quiz = MotorQuiz("partes_oido", generate_question)
 
 # --- Interfaz del Juego ---
 st.title("👂 Juego: Las Partes del Oído")
 
-# *** LÍNEA CORREGIDA PARA EL NOMBRE DE ARCHIVO EN MINÚSCULAS ***
-image_path = "partes_oido.jpg"
-# ***************************************************************
-
-if not os.path.exists(image_path):
+if imagen is None:
     # Esto ya no debería aparecer en Streamlit Cloud
     st.error(f"Error: La imagen '{image_path}' no se encuentra. Asegúrate de que esté guardada en la misma carpeta que el script.")
+elif imagen["estatico"]:
+    # El navegador descarga la variante adecuada una vez y la guarda en su caché
+    st.markdown(html_imagen(imagen["variantes"], "Partes del oído", PIE_IMAGEN), unsafe_allow_html=True)
 else:
-    st.image(image_path, caption="Identifica la parte del oído señalada")
+    st.image(imagen["bytes"], caption=PIE_IMAGEN)
 
 st.markdown("---")
 
-if st.session_state.current_question_num is None:
-    if st.button("Empezar / Siguiente Pregunta", use_container_width=True):
-        generate_question()
+if not quiz.abierta:
+    # Resultado de la pregunta anterior (si la hay)
+    if quiz.acertada:
+        st.success("¡Correcto! ✅")
+        st.balloons()
+    elif quiz.respondida:
+        st.error(f"¡Incorrecto! ❌ La respuesta correcta para el número {quiz.datos} es: **{quiz.correcta}**.")
+    quiz.boton_siguiente("Empezar / Siguiente Pregunta")
+    if quiz.estado["respondidas"]:
+        st.caption(quiz.marcador())
 else:
-    st.subheader(f"¿Qué parte del oído es el número **{st.session_state.current_question_num}**?")
-    
-    # Prepara las opciones de respuesta (la correcta y 3 incorrectas)
-    correct_answer = PARTES_OIDO_CON_NUMEROS[st.session_state.current_question_num]
-    opciones = [correct_answer]
-    distractores = [p for p in TODAS_LAS_PARTES if p != correct_answer]
-    opciones.extend(random.sample(distractores, min(3, len(distractores))))
-    random.shuffle(opciones)
+    st.subheader(f"¿Qué parte del oído es el número **{quiz.datos}**?")
+    quiz.botones_opciones(2)
 
-    cols = st.columns(2)
-    for i, opcion in enumerate(opciones):
-        with cols[i % 2]:
-            if st.button(opcion, key=f"op_{opcion}", use_container_width=True):
-                check_answer(opcion)
-    
-    # Muestra el feedback si ya se ha respondido
-    if st.session_state.feedback:
-        st.info(st.session_state.feedback)
\ No newline at end of file
+panel_depuracion()
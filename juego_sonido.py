@@ -1,12 +1,15 @@
 import streamlit as st
-import numpy as np
+import metricas
+from metricas_web import panel_depuracion
 import random
-import io
-from scipy.io.wavfile import write as write_wav # Importación clave para crear archivos WAV
 import os 
+from audio_web import clip_compacto, tasa_cliente
+from motor_quiz import MotorQuiz
+from preguntas import PreparadorPreguntas
 
 # --- Configuración de la página ---
 st.set_page_config(page_title="Juego del Sonido", layout="centered")
+metricas.empezar_interaccion("juego_sonido")
 
 # --- Estilos Personalizados ---
 COLOR_FONDO = "#FFF5F2"
@@ -29,8 +32,10 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # --- Configuración del Audio ---
-SAMPLE_RATE = 44100 # Muestras por segundo
 DURACION_SONIDO = 1.0 # Duración en segundos
+# El cliente puede pedir la frecuencia de muestreo de su tarjeta (?sample_rate=48000)
+# para que el navegador no remuestree; si no, la mínima que conserva el tono
+TASA_CLIENTE = tasa_cliente(st.query_params.get("sample_rate"))
 
 # --- Clasificación de Sonidos para el Juego ---
 CUALIDADES = {
@@ -44,32 +49,9 @@ CUALIDADES = {
     }
 }
 
-# --- FUNCIÓN DE AUDIO CORREGIDA (SOLUCIÓN AL PortAudioError) ---
+# --- PREGUNTAS (el audio se envía con st.audio: solución al PortAudioError) ---
 
-def play_sound(frecuencia, amplitud, duracion):
-    """
-    Genera una onda sinusoidal, la convierte a WAV y la reproduce con st.audio.
-    """
-    t = np.linspace(0, duracion, int(SAMPLE_RATE * duracion), endpoint=False)
-    # Generación de la onda
-    onda = amplitud * np.sin(2 * np.pi * frecuencia * t)
-    
-    # 1. Crear un búfer en memoria (archivo temporal en RAM)
-    buffer = io.BytesIO()
-    
-    # 2. Escribir el audio en el búfer como un archivo WAV de 16-bit
-    # Normalizamos (multiplicamos por 32767) y convertimos a int16 para el formato WAV
-    escala_16bit = 32767
-    audio_data = (onda * escala_16bit).astype(np.int16)
-    write_wav(buffer, SAMPLE_RATE, audio_data) 
-    
-    # 3. Mover el "cursor" al inicio del búfer
-    buffer.seek(0)
-    
-    # 4. Reproducir el audio usando la función de Streamlit
-    st.audio(buffer.read(), format='audio/wav')
-
-def generate_new_question():
+def sortear_pregunta():
     """Selecciona una cualidad y un valor (ej: Altura y Agudo) al azar."""
     cualidad_key, cualidad_params = random.choice(list(CUALIDADES.items()))
     valor_key, (min_val, max_val) = random.choice(list(cualidad_params.items()))
@@ -84,71 +66,61 @@ def generate_new_question():
         frecuencia = 440
         amplitud = random.uniform(min_val, max_val)
 
-    # Guarda la información de la pregunta en el estado de la sesión
-    st.session_state.correct_answer = valor_key
-    st.session_state.question_type = cualidad_key
-    st.session_state.frecuencia = frecuencia
-    st.session_state.amplitud = amplitud
-    st.session_state.feedback = ""
-    
-    # Reproduce el sonido
-    play_sound(frecuencia, amplitud, DURACION_SONIDO)
-
+    return {"correct_answer": valor_key, "question_type": cualidad_key,
+            "frecuencia": frecuencia, "amplitud": amplitud}
 
-# --- LÓGICA DEL JUEGO ---
+@st.cache_resource
+def obtener_preparador(sample_rate=None):
+    """Preguntas preparadas por adelantado en un hilo de fondo, compartidas por las sesiones con la misma frecuencia de muestreo."""
+    return PreparadorPreguntas(sortear_pregunta, DURACION_SONIDO, sample_rate=sample_rate)
 
-def check_answer(user_answer):
-    """Comprueba la respuesta del usuario."""
-    if user_answer == st.session_state.correct_answer:
-        st.session_state.feedback = f"¡Correcto! ✅ El sonido era: **{st.session_state.correct_answer}**."
-        st.success(st.session_state.feedback)
-        st.balloons()
-    else:
-        st.session_state.feedback = f"¡Incorrecto! ❌ La respuesta correcta era: **{st.session_state.correct_answer}**."
-        st.error(st.session_state.feedback)
-    
-    # Después de responder, preparamos la interfaz para la siguiente pregunta
-    st.session_state.game_active = False
+def generate_new_question():
+    """Toma la siguiente pregunta ya preparada (parámetros y audio codificado) y fija sus opciones."""
+    pregunta = obtener_preparador(TASA_CLIENTE).siguiente()
+    opciones = list(CUALIDADES[pregunta["question_type"]].keys())
+    random.shuffle(opciones)
+    datos = {clave: pregunta[clave] for clave in ("question_type", "frecuencia", "amplitud")}
+    # El audio preparado se guarda con la frecuencia de muestreo a la que se codificó
+    datos["audio"] = {TASA_CLIENTE: (pregunta["audio"], pregunta["formato"])}
+    return opciones, opciones.index(pregunta["correct_answer"]), datos
 
-# --- Inicialización del estado de la sesión ---
-if 'game_active' not in st.session_state:
-    st.session_state.game_active = False
-    st.session_state.feedback = "Pulsa 'Empezar' para escuchar el primer sonido."
-    st.session_state.correct_answer = ""
-    st.session_state.question_type = ""
+# Las opciones se sortean una vez por pregunta y se guardan en session_state
+quiz = MotorQuiz("sonido", generate_new_question, "Pulsa 'Empezar' para escuchar el primer sonido.")
 
 # --- Interfaz de Usuario ---
 st.title("🎵 Juego de Sonido")
 st.subheader("¡Escucha con atención y adivina la cualidad del sonido misterioso!")
 
-if not st.session_state.game_active:
+if not quiz.abierta:
     st.markdown("---")
-    if st.button("▶️ Empezar / Siguiente Sonido", use_container_width=True):
-        st.session_state.game_active = True
-        generate_new_question()
-        st.rerun()
-    
-    st.info(st.session_state.feedback)
+    # Resultado de la pregunta anterior (si la hay)
+    if quiz.acertada:
+        st.success(f"¡Correcto! ✅ El sonido era: **{quiz.correcta}**.")
+        st.balloons()
+    elif quiz.respondida:
+        st.error(f"¡Incorrecto! ❌ La respuesta correcta era: **{quiz.correcta}**.")
+    quiz.boton_siguiente("▶️ Empezar / Siguiente Sonido")
+
+    if quiz.estado["mensaje"]:
+        st.info(quiz.estado["mensaje"])
+    if quiz.estado["respondidas"]:
+        st.caption(quiz.marcador())
     st.markdown("---")
 
 else:
-    st.markdown(f"**Cualidad a adivinar:** {st.session_state.question_type}")
+    pregunta = quiz.datos
+    st.markdown(f"**Cualidad a adivinar:** {pregunta['question_type']}")
     st.markdown("---")
-    
-    # Opciones de respuesta para la cualidad actual
-    opciones = list(CUALIDADES[st.session_state.question_type].keys())
-    random.shuffle(opciones)
-    
+
+    # Los bytes que codificó el preparador: el reproductor suena solo y permite volver a escucharlo.
+    # Solo si el cliente ha cambiado de frecuencia de muestreo a media pregunta se vuelve a codificar.
     st.info("👂 **Vuelve a escuchar el sonido** (si es necesario):")
-    if st.button("Repetir Sonido", key="repeat_sound"):
-        play_sound(st.session_state.frecuencia, st.session_state.amplitud, DURACION_SONIDO)
-    
+    audio, formato = pregunta["audio"].get(TASA_CLIENTE) or clip_compacto(
+        pregunta["frecuencia"], pregunta["amplitud"], DURACION_SONIDO, sample_rate=TASA_CLIENTE)
+    st.audio(audio, format=formato, autoplay=True)
+
     # Muestra la pregunta y las opciones
-    st.subheader("¿Cómo describirías este sonido según su **{}**?".format(st.session_state.question_type.split(' ')[0]))
-    
-    cols = st.columns(len(opciones))
-    for i, opcion in enumerate(opciones):
-        with cols[i]:
-            if st.button(opcion, key=f"op_{opcion}", use_container_width=True):
-                check_answer(opcion)
-                st.rerun()
\ No newline at end of file
+    st.subheader("¿Cómo describirías este sonido según su **{}**?".format(pregunta["question_type"].split(' ')[0]))
+    quiz.botones_opciones(len(quiz.estado["opciones"]))
+
+panel_depuracion()
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# --- Configuración de las métricas ---
+# Desactivadas por defecto; se activan con VISUALIZADOR_METRICAS=1 o con activar()
+ACTIVAS = os.environ.get("VISUALIZADOR_METRICAS", "") not in ("", "0")
+ARCHIVO_JSONL = os.environ.get("VISUALIZADOR_METRICAS_JSONL") # un registro por interacción
+ARCHIVO_PROMETHEUS = os.environ.get("VISUALIZADOR_METRICAS_PROMETHEUS") # formato de texto
+INTERACCIONES_GUARDADAS = 50
+
+_local = threading.local()
+_lock = threading.Lock()
+_totales = {} # tramo: [llamadas, segundos, máximo]
+ultimas = deque(maxlen=INTERACCIONES_GUARDADAS)
+
+
+def activar(jsonl=None, prometheus=None):
+    """Activa las mediciones y, opcionalmente, la exportación a archivo."""
+    global ACTIVAS, ARCHIVO_JSONL, ARCHIVO_PROMETHEUS
+    ACTIVAS = True
+    ARCHIVO_JSONL = jsonl or ARCHIVO_JSONL
+    ARCHIVO_PROMETHEUS = prometheus or ARCHIVO_PROMETHEUS
+
+
+class _Nulo:
+    """Tramo que no mide nada: lo que se usa con las métricas apagadas."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Tramo:
+    __slots__ = ("nombre", "inicio")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        anotar(self.nombre, time.perf_counter() - self.inicio)
+        return False
+
+
+def tramo(nombre):
+    """
+    Mide lo que pasa dentro de un `with`: `with tramo("sintesis"): ...`.
+
+    Con las métricas apagadas devuelve siempre el mismo objeto vacío, así que
+    el coste es una llamada y una comprobación.
+    """
+    return _Tramo(nombre) if ACTIVAS else _NULO
+
+
+def anotar(nombre, segundos):
+    """Suma una medición a los totales y a la interacción en curso de este hilo."""
+    with _lock:
+        total = _totales.setdefault(nombre, [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += segundos
+        total[2] = max(total[2], segundos)
+    actual = getattr(_local, "interaccion", None)
+    if actual is not None:
+        actual["tramos"][nombre] = actual["tramos"].get(nombre, 0.0) + segundos * 1000
+
+
+def incorporar_tramos(tramos):
+    """
+    Suma a la interacción abierta en este hilo `tramos` {nombre: ms} medidos en
+    otro hilo (p. ej. la síntesis del trabajador). Ya están en los totales.
+    """
+    actual = getattr(_local, "interaccion", None)
+    if actual is not None and tramos:
+        for nombre, ms in tramos.items():
+            actual["tramos"][nombre] = actual["tramos"].get(nombre, 0.0) + ms
+
+
+def empezar_interaccion(nombre):
+    """
+    Abre una interacción en este hilo (un rerun, un clic...): los tramos que se
+    midan hasta `terminar_interaccion` se agrupan en un mismo registro. Si
+    quedaba otra abierta (p. ej. un st.rerun la interrumpió), se cierra antes.
+    """
+    if not ACTIVAS:
+        return
+    terminar_interaccion()
+    _local.interaccion = {"interaccion": nombre, "fecha": time.time(),
+                          "inicio": time.perf_counter(), "tramos": {}}
+
+
+def interaccion_abierta():
+    """True si hay una interacción abierta en este hilo."""
+    return getattr(_local, "interaccion", None) is not None
+
+
+def terminar_interaccion():
+    """Cierra la interacción abierta, la guarda en `ultimas` y la exporta. Devuelve el registro."""
+    registro = getattr(_local, "interaccion", None)
+    if registro is None:
+        return None
+    _local.interaccion = None
+    registro["total_ms"] = (time.perf_counter() - registro.pop("inicio")) * 1000
+    ultimas.append(registro)
+    if ARCHIVO_JSONL:
+        with _lock, open(ARCHIVO_JSONL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    if ARCHIVO_PROMETHEUS:
+        escribir_prometheus(ARCHIVO_PROMETHEUS)
+    return registro
+
+
+def resumen():
+    """{tramo: {"llamadas", "total_ms", "medio_ms", "max_ms"}} desde el arranque."""
+    with _lock:
+        return {nombre: {"llamadas": n, "total_ms": s * 1000, "medio_ms": s * 1000 / n, "max_ms": m * 1000}
+                for nombre, (n, s, m) in sorted(_totales.items())}
+
+
+def formato_prometheus():
+    """Totales en el formato de texto de Prometheus (para el textfile collector)."""
+    lineas = [
+        "# HELP visualizador_tramo_segundos_total Tiempo acumulado en cada tramo.",
+        "# TYPE visualizador_tramo_segundos_total counter",
+    ]
+    with _lock:
+        totales = sorted(_totales.items())
+    lineas += [f'visualizador_tramo_segundos_total{{tramo="{nombre}"}} {s:.9f}' for nombre, (_, s, _) in totales]
+    lineas += [
+        "# HELP visualizador_tramo_llamadas_total Veces que se ha medido cada tramo.",
+        "# TYPE visualizador_tramo_llamadas_total counter",
+    ]
+    lineas += [f'visualizador_tramo_llamadas_total{{tramo="{nombre}"}} {n}' for nombre, (n, _, _) in totales]
+    lineas += [
+        "# HELP visualizador_tramo_max_segundos Duración máxima de cada tramo.",
+        "# TYPE visualizador_tramo_max_segundos gauge",
+    ]
+    lineas += [f'visualizador_tramo_max_segundos{{tramo="{nombre}"}} {m:.9f}' for nombre, (_, _, m) in totales]
+    return "\n".join(lineas) + "\n"
+
+
+def escribir_prometheus(ruta):
+    # Se escribe aparte y se renombra: el recolector nunca lee un archivo a medias
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(formato_prometheus())
+    os.replace(temporal, ruta)
+
+
+def texto_interaccion(registro):
+    """Una línea legible: "redibujo 4.2 ms · sintesis 0.3 ms · render_agg 3.6 ms"."""
+    partes = [f"{registro['interaccion']} {registro['total_ms']:.1f} ms"]
+    partes += [f"{nombre} {ms:.1f} ms" for nombre, ms in registro["tramos"].items()]
+    return " · ".join(partes)
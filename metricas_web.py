@@ -0,0 +1,29 @@
+import streamlit as st
+
+import metricas
+
+
+def panel_depuracion():
+    """
+    Cierra la interacción del rerun actual y, con las métricas activas, muestra
+    en la barra lateral un panel plegable con lo que ha costado cada tramo.
+    Se llama al final del script.
+    """
+    registro = metricas.terminar_interaccion()
+    if not metricas.ACTIVAS:
+        return
+    with st.sidebar.expander("🛠️ Depuración: tiempos", expanded=False):
+        if registro is not None:
+            st.caption(metricas.texto_interaccion(registro))
+        st.dataframe(
+            [{"tramo": nombre, **{clave: round(valor, 3) for clave, valor in datos.items()}}
+             for nombre, datos in metricas.resumen().items()],
+            hide_index=True,
+        )
+        st.caption("Últimos reruns")
+        st.dataframe(
+            [{"rerun": r["interaccion"], "total_ms": round(r["total_ms"], 1),
+              **{nombre: round(ms, 2) for nombre, ms in r["tramos"].items()}}
+             for r in reversed(metricas.ultimas)],
+            hide_index=True,
+        )
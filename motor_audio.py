@@ -0,0 +1,137 @@
+import functools
+import threading
+
+import numpy as np
+
+from metricas import tramo
+from sintesis import SAMPLE_RATE, Oscilador, OsciladorVoces, parametros_voces
+
+# --- Configuración del flujo de audio ---
+BLOQUE_AUDIO = 256 # muestras por bloque (~5,8 ms a 44,1 kHz)
+LATENCIA_AUDIO = "low" # o un número de segundos, como en sounddevice
+
+
+@functools.cache
+def tasa_nativa():
+    """
+    Frecuencia de muestreo nativa del dispositivo de salida por defecto.
+
+    Sintetizar directamente a esa frecuencia evita que PortAudio (o el sistema)
+    remuestree cada bloque. Si no se puede consultar (sin PortAudio, sin
+    dispositivo...), SAMPLE_RATE. Se consulta una sola vez por proceso.
+    """
+    try:
+        import sounddevice as sd
+    except OSError: # sin PortAudio
+        return SAMPLE_RATE
+    try:
+        return int(sd.query_devices(kind="output")["default_samplerate"])
+    except (sd.PortAudioError, ValueError): # sin dispositivo de salida
+        return SAMPLE_RATE
+
+
+class MotorAudio:
+    """
+    Flujo de salida persistente que genera el sonido bloque a bloque.
+
+    En lugar de sintetizar el clip entero y pasárselo a `sd.play`, el callback
+    de un único `sd.OutputStream` pide cada bloque a un `Oscilador` de fase
+    continua. La memoria es constante sea cual sea la duración, y los cambios
+    de tono o volumen se aplican en el siguiente bloque sin cortar el sonido.
+
+    Sin `sample_rate`, al abrir el flujo se usa la frecuencia nativa del
+    dispositivo (`tasa_nativa`); hasta entonces, `sample_rate` es SAMPLE_RATE.
+    """
+
+    def __init__(self, sample_rate=None, bloque=BLOQUE_AUDIO, latencia=LATENCIA_AUDIO):
+        self.tasa_pedida = sample_rate
+        self.bloque = bloque
+        self.latencia = latencia
+        self._cambiar_tasa(sample_rate or SAMPLE_RATE)
+        # (frecuencia, amplitud, es_compleja, timbre): se sustituye la tupla entera,
+        # así el callback nunca ve una mezcla de valores viejos y nuevos
+        self.parametros = (440.0, 0.0, False, None)
+        # Con voces, (frecuencias, amplitudes, fases, silencio) de parametros_voces
+        # (más unas amplitudes a cero para el fundido); None = un solo tono
+        self.voces = None
+        # El callback solo escribe `emitidas` y el hilo principal solo escribe `fin`
+        self.emitidas = 0 # muestras enviadas al dispositivo
+        self.fin = 0 # muestra en la que debe callar; None = sin límite
+        # Función opcional que recibe cada bloque generado (p. ej. AnalizadorEspectral.agregar).
+        # Se llama desde el hilo de audio: debe ser rápida y no asignar memoria.
+        self.monitor = None
+        self.stream = None
+        self._lock = threading.Lock()
+
+    def _cambiar_tasa(self, sample_rate):
+        """Osciladores nuevos para `sample_rate` (solo con el flujo cerrado)."""
+        self.sample_rate = sample_rate
+        self.oscilador = Oscilador(sample_rate, self.bloque)
+        self.oscilador_voces = OsciladorVoces(sample_rate, self.bloque)
+
+    def iniciar(self):
+        """
+        Abre el flujo de salida si aún no está abierto.
+
+        Sin PortAudio o sin dispositivo de salida (p. ej. en un servidor) lanza OSError.
+        """
+        with self._lock:
+            if self.stream is None:
+                with tramo("inicio_audio"):
+                    # sounddevice (y PortAudio) solo se cargan al reproducir por primera vez
+                    import sounddevice as sd
+                    tasa = self.tasa_pedida or tasa_nativa()
+                    if tasa != self.sample_rate:
+                        self._cambiar_tasa(tasa)
+                    try:
+                        stream = sd.OutputStream(
+                            samplerate=self.sample_rate, blocksize=self.bloque, latency=self.latencia,
+                            channels=1, dtype="float32", callback=self._callback,
+                        )
+                        stream.start()
+                    except sd.PortAudioError as error:
+                        raise OSError(f"No hay dispositivo de audio: {error}") from error
+                    self.stream = stream
+
+    def actualizar(self, frecuencia, amplitud, es_compleja=False, timbre=None):
+        """Cambia los parámetros; el callback los recoge en el siguiente bloque."""
+        self.parametros = (float(frecuencia), float(amplitud), bool(es_compleja), timbre)
+
+    def actualizar_voces(self, voces):
+        """Suena la mezcla de `voces` [(frecuencia, amplitud, fase en grados)]; None o [] vuelve al tono."""
+        if not voces:
+            self.voces = None
+            return
+        frecuencias, amplitudes, fases = parametros_voces(voces)
+        self.voces = (frecuencias, amplitudes, fases, np.zeros_like(amplitudes))
+
+    def reproducir(self, duracion=None):
+        """Suena durante `duracion` segundos (o hasta `detener` si es None)."""
+        self.iniciar()
+        self.fin = None if duracion is None else self.emitidas + int(duracion * self.sample_rate)
+
+    def detener(self):
+        """Baja el volumen a cero en el siguiente bloque."""
+        self.fin = self.emitidas
+
+    def cerrar(self):
+        with self._lock:
+            if self.stream is not None:
+                self.stream.stop()
+                self.stream.close()
+                self.stream = None
+
+    def _callback(self, outdata, frames, time_info, status):
+        frecuencia, amplitud, es_compleja, timbre = self.parametros
+        voces = self.voces
+        fin = self.fin
+        callar = fin is not None and self.emitidas + frames >= fin
+        if voces is not None:
+            frecuencias, amplitudes, fases, silencio = voces
+            # Último bloque: la rampa de amplitud hasta cero hace de fundido
+            self.oscilador_voces.llenar(outdata[:, 0], frecuencias, silencio if callar else amplitudes, fases)
+        else:
+            self.oscilador.llenar(outdata[:, 0], frecuencia, 0.0 if callar else amplitud, es_compleja, timbre)
+        self.emitidas += frames
+        if self.monitor is not None:
+            self.monitor(outdata[:, 0])
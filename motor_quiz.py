@@ -0,0 +1,83 @@
+import streamlit as st
+
+
+class MotorQuiz:
+    """
+    Estado y botones de un juego de preguntas con respuesta única, común a los juegos.
+
+    `generar()` devuelve (opciones, índice de la correcta, datos): las opciones se
+    sortean una sola vez por pregunta y se guardan en session_state como una
+    tupla, así que los botones conservan su orden y su clave ("op_<índice>")
+    en todos los reruns. Los botones usan callbacks (`on_click`): el estado ya
+    está actualizado cuando empieza el rerun del clic, y cada clic cuesta
+    exactamente un rerun, sin `st.rerun()`.
+    """
+
+    def __init__(self, nombre, generar, mensaje_inicial=""):
+        self.clave = f"quiz_{nombre}"
+        self.generar = generar
+        if self.clave not in st.session_state:
+            st.session_state[self.clave] = {
+                "opciones": (), # textos de los botones, en el orden en que se muestran
+                "correcta": None, # índice de la opción correcta en `opciones`
+                "datos": None, # lo que cada juego necesite para mostrar la pregunta
+                "respuesta": None, # índice elegido; None mientras la pregunta está abierta
+                "aciertos": 0,
+                "respondidas": 0,
+                "mensaje": mensaje_inicial,
+            }
+
+    @property
+    def estado(self):
+        return st.session_state[self.clave]
+
+    @property
+    def abierta(self):
+        """Hay una pregunta en pantalla esperando respuesta."""
+        return self.estado["correcta"] is not None and self.estado["respuesta"] is None
+
+    @property
+    def respondida(self):
+        """La pregunta actual ya tiene respuesta (se está mostrando el resultado)."""
+        return self.estado["respuesta"] is not None
+
+    @property
+    def acertada(self):
+        return self.respondida and self.estado["respuesta"] == self.estado["correcta"]
+
+    @property
+    def datos(self):
+        return self.estado["datos"]
+
+    @property
+    def correcta(self):
+        """Texto de la opción correcta de la pregunta actual."""
+        return self.estado["opciones"][self.estado["correcta"]]
+
+    def nueva(self):
+        """Callback: sortea la siguiente pregunta y sus opciones (una sola vez)."""
+        opciones, correcta, datos = self.generar()
+        self.estado.update(opciones=tuple(opciones), correcta=correcta, datos=datos, respuesta=None, mensaje="")
+
+    def responder(self, indice):
+        """Callback: anota la opción `indice` y cierra la pregunta."""
+        estado = self.estado
+        if estado["respuesta"] is not None:
+            return # doble clic: la pregunta ya estaba contestada
+        estado["respuesta"] = indice
+        estado["respondidas"] += 1
+        estado["aciertos"] += indice == estado["correcta"]
+
+    def boton_siguiente(self, etiqueta):
+        st.button(etiqueta, on_click=self.nueva, use_container_width=True)
+
+    def botones_opciones(self, columnas):
+        """Un botón por opción, repartidos en `columnas` columnas."""
+        cols = st.columns(columnas)
+        for i, opcion in enumerate(self.estado["opciones"]):
+            with cols[i % columnas]:
+                st.button(opcion, key=f"op_{i}", on_click=self.responder, args=(i,), use_container_width=True)
+
+    def marcador(self):
+        estado = self.estado
+        return f"Aciertos: {estado['aciertos']} de {estado['respondidas']}"
@@ -0,0 +1,98 @@
+import numba
+import numpy as np
+
+from timbres import TAMANO_TABLA
+
+# --- Núcleos compilados de la síntesis ---
+# Solo se importa si Numba está instalado (ver sintesis.backend). Cada núcleo
+# hace en una sola pasada por muestra lo que con NumPy son varias pasadas
+# completas: fase, seno o lectura de la tabla, armónico, escala y conversión al
+# tipo de `out`. El seno es un polinomio sobre la fase plegada a un cuarto de
+# ciclo, que LLVM vectoriza (np.sin escalar no); su error es < 1e-7.
+# `incremento` son los ciclos por muestra y `escala` la amplitud (por 32767 si
+# `out` es entero). Se compilan en la primera llamada con cada tipo de `out` y
+# la compilación queda guardada en __pycache__.
+
+DOS_PI = 2 * np.pi
+# Máximo de sin x + sin(2x)/3 en ciclos: cos x = (√41 - 3) / 8 anula la derivada
+CICLO_PICO = float(np.arccos((np.sqrt(41) - 3) / 8) / DOS_PI)
+
+
+@numba.njit(inline="always")
+def _seno_ciclos(ciclos):
+    """sin(2π · ciclos) con un polinomio de Taylor de grado 11 en [-π/2, π/2]."""
+    ciclos -= np.rint(ciclos) # [-0.5, 0.5]
+    if ciclos > 0.25:
+        ciclos = 0.5 - ciclos
+    elif ciclos < -0.25:
+        ciclos = -0.5 - ciclos
+    x = DOS_PI * ciclos
+    x2 = x * x
+    return x * (1.0 + x2 * (-1 / 6 + x2 * (1 / 120 + x2 * (-1 / 5040 + x2 * (1 / 362880 + x2 * (-1 / 39916800))))))
+
+
+@numba.njit(cache=True, nogil=True)
+def _seno(out, incremento, escala):
+    for j in range(out.shape[0]):
+        out[j] = _seno_ciclos(j * incremento) * escala
+    return out
+
+
+@numba.njit(inline="always")
+def _armonico_ciclos(ciclos):
+    return _seno_ciclos(ciclos) + _seno_ciclos(2.0 * ciclos) / 3
+
+
+@numba.njit(cache=True, nogil=True)
+def _pico_armonico(n, incremento):
+    """
+    Pico de |sin x + sin(2x)/3| en las n muestras del clip, sin recorrerlo entero.
+
+    La onda tiene un solo máximo por periodo (en CICLO_PICO) y un solo mínimo (en
+    -CICLO_PICO), y entre ellos es monótona: el pico de las muestras está en las
+    dos que rodean algún máximo o mínimo, o en un extremo del clip. Cuesta
+    O(periodos) y da lo mismo que el máximo de NumPy sobre todo el clip.
+    """
+    ultimo = (n - 1) * incremento
+    pico = max(abs(_armonico_ciclos(0.0)), abs(_armonico_ciclos(ultimo)))
+    for centro in (CICLO_PICO, -CICLO_PICO):
+        for periodo in range(int(np.ceil(-centro)), int(np.floor(ultimo - centro)) + 1):
+            j = min(max(int((centro + periodo) / incremento), 0), n - 2)
+            pico = max(pico, abs(_armonico_ciclos(j * incremento)), abs(_armonico_ciclos((j + 1) * incremento)))
+    return pico
+
+
+@numba.njit(cache=True, nogil=True)
+def _seno_armonico(out, incremento, escala):
+    n = out.shape[0]
+    if n > 1:
+        pico = _pico_armonico(n, abs(incremento)) # la onda es impar: el signo no cambia el pico
+        if pico > 0:
+            escala /= pico
+    for j in range(n):
+        out[j] = _armonico_ciclos(j * incremento) * escala
+    return out
+
+
+@numba.njit(cache=True, nogil=True)
+def _tabla(out, incremento, tabla, pendientes, escala):
+    for j in range(out.shape[0]):
+        ciclos = j * incremento
+        posicion = (ciclos - np.floor(ciclos)) * TAMANO_TABLA
+        indice = min(int(posicion), TAMANO_TABLA - 1)
+        out[j] = (tabla[indice] + pendientes[indice] * (posicion - indice)) * escala
+    return out
+
+
+def onda(out, incremento, escala, es_compleja=False, tabla=None, pendientes=None):
+    """
+    Escribe en `out` la onda de `incremento` ciclos por muestra, como sintesis.generar_onda.
+
+    Con `tabla` (y `pendientes`, de timbres.tabla_onda) se lee la tabla de onda;
+    si no, un seno, con el armónico 2× normalizado al pico si `es_compleja`.
+    """
+    if tabla is not None:
+        return _tabla(out, incremento, tabla, pendientes, escala)
+    if es_compleja:
+        return _seno_armonico(out, incremento, escala)
+    return _seno(out, incremento, escala)
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, font
-import numpy as np
-import sounddevice as sd # <--- SONIDO REACTIVADO
+from decimacion import onda_para_grafico
+from motor_audio import MotorAudio # <--- SONIDO REACTIVADO
 
 import matplotlib
 matplotlib.use('TkAgg')
@@ -58,6 +58,7 @@ class AppOndas(tk.Tk):
         self.lienzo = FigureCanvasTkAgg(self.fig, master=self)
         self.lienzo.get_tk_widget().pack(side="top", fill="both", expand=True, padx=10, pady=10)
 
+        self.motor = MotorAudio()
         self.actualizar_onda_visual()
 
     def crear_estilo_personalizado(self):
@@ -81,17 +82,9 @@ class AppOndas(tk.Tk):
         duracion = self.dur_var.get()
         es_compleja = self.timbre_var.get()
 
-        puntos_visuales = 2000 
-        tiempo = np.linspace(0, duracion, puntos_visuales)
-        
-        if es_compleja:
-            onda_principal = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-            armonico = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo)
-            onda = onda_principal + armonico
-            max_val = np.max(np.abs(onda))
-            if max_val > 0: onda = (onda / max_val) * amplitud
-        else:
-            onda = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
+        # Señal real reducida a mínimo/máximo por cada columna de píxeles de los ejes
+        columnas = max(1, int(self.ax.bbox.width))
+        tiempo, onda = onda_para_grafico(frecuencia, amplitud, duracion, es_compleja, columnas)
 
         self.ax.clear()
         self.ax.plot(tiempo, onda, color=COLOR_ACENTO, linewidth=2)
@@ -116,22 +109,9 @@ class AppOndas(tk.Tk):
         duracion = self.dur_var.get()
         es_compleja = self.timbre_var.get()
 
-        # Para el audio SIEMPRE usamos muchos puntos (alta tasa de muestreo)
-        sample_rate = 44100
-        puntos_audio = int(duracion * sample_rate)
-        tiempo = np.linspace(0, duracion, puntos_audio, endpoint=False)
-        
-        if es_compleja:
-            onda_principal = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-            armonico = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo)
-            onda = onda_principal + armonico
-            max_val = np.max(np.abs(onda))
-            if max_val > 0: onda = (onda / max_val) * amplitud
-        else:
-            onda = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-        
-        # Reproducimos la onda
-        sd.play(onda.astype(np.float32), sample_rate)
+        # El motor genera el audio bloque a bloque sobre un flujo persistente
+        self.motor.actualizar(frecuencia, amplitud, es_compleja)
+        self.motor.reproducir(duracion)
 
 if __name__ == "__main__":
     app = AppOndas()
@@ -1,12 +1,14 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
-from tkinter import ttk, font
-import numpy as np
-import sounddevice as sd
-
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import filedialog, messagebox, simpledialog, ttk, font
+import metricas
+from decimacion import onda_para_grafico, voces_para_grafico
+from motor_audio import MotorAudio
+from sintesis import VOCES_MAX
+from timbres import TIMBRE_PURO, TIMBRES
 
 # --- PALETA DE COLORES ---
 COLOR_FONDO = "#FFF5F2"
@@ -14,12 +16,17 @@ COLOR_FONDO_GRAFICO = "#F5BABB"
 COLOR_ACENTO = "#568F87"
 COLOR_TEXTO = "#064232"
 
+INTERVALO_REDIBUJO = 16 # ms, unos 60 fotogramas por segundo
+INTERVALO_ESPECTRO = 50 # ms entre actualizaciones del panel de frecuencias
+INTERVALO_RECOGIDA = 5 # ms entre comprobaciones de resultados del hilo trabajador
+VOCES_INICIALES = [(10.0, 0.5, 0.0), (11.0, 0.5, 0.0)] # batidos de 1 Hz
+
 class AppOndas(tk.Tk):
     def __init__(self):
         super().__init__()
         # --- TÍTULO DE VERIFICACIÓN ---
         self.title("Visualizador de Ondas (VERSIÓN FINAL)")
-        self.geometry("800x700")
+        self.geometry("800x1080")
         self.configure(bg=COLOR_FONDO)
 
         self.crear_estilo_personalizado()
@@ -30,7 +37,8 @@ class AppOndas(tk.Tk):
         self.freq_var = tk.DoubleVar(value=10) # Frecuencia inicial baja
         self.amp_var = tk.DoubleVar(value=0.8)
         self.dur_var = tk.DoubleVar(value=1.0)
-        self.timbre_var = tk.BooleanVar()
+        self.timbre_var = tk.StringVar(value=TIMBRE_PURO)
+        self.en_vivo_var = tk.BooleanVar(value=True)
 
         ttk.Label(marco_controles, text="Tono (Hz)", style="Custom.TLabel").grid(row=0, column=0, sticky="w", padx=5, pady=5)
         # Rango de frecuencia ajustado para que sea más útil visualmente
@@ -42,25 +50,207 @@ class AppOndas(tk.Tk):
         ttk.Label(marco_controles, text="Duración (s)", style="Custom.TLabel").grid(row=2, column=0, sticky="w", padx=5, pady=5)
         ttk.Scale(marco_controles, from_=0.1, to=3.0, orient="horizontal", variable=self.dur_var).grid(row=2, column=1, sticky="ew", padx=5)
         
-        ttk.Checkbutton(marco_controles, text="Añadir armónico (Timbre complejo)", variable=self.timbre_var, style="Custom.TCheckbutton").grid(row=3, column=0, columnspan=2, pady=10)
+        ttk.Label(marco_controles, text="Timbre", style="Custom.TLabel").grid(row=3, column=0, sticky="w", padx=5, pady=10)
+        ttk.Combobox(marco_controles, values=list(TIMBRES), textvariable=self.timbre_var, state="readonly").grid(row=3, column=1, sticky="w", padx=5, pady=10)
+        ttk.Checkbutton(marco_controles, text="Dibujar en vivo al mover los controles", variable=self.en_vivo_var, style="Custom.TCheckbutton").grid(row=5, column=0, columnspan=2, pady=(0, 10))
 
         marco_botones_accion = ttk.Frame(marco_controles, style="Custom.TFrame")
         marco_botones_accion.grid(row=4, column=0, columnspan=2)
 
         ttk.Button(marco_botones_accion, text="Dibujar Onda", command=self.actualizar_onda_visual, style="Custom.TButton").pack(side="left", padx=10, pady=10)
         ttk.Button(marco_botones_accion, text="▶ Reproducir Sonido", command=self.reproducir_sonido, style="Custom.TButton").pack(side="left", padx=10, pady=10)
+        self.boton_exportar = ttk.Button(marco_botones_accion, text="💾 Exportar WAV…", command=self.exportar_wav, style="Custom.TButton")
+        self.boton_exportar.pack(side="left", padx=10, pady=10)
 
         marco_controles.columnconfigure(1, weight=1)
 
+        self.crear_panel_voces()
+
+        # Barra de estado con los tiempos de la última interacción (solo con las métricas activas)
+        self.barra_estado = None
+        if metricas.ACTIVAS:
+            self.barra_estado = ttk.Label(self, text="Métricas activas", style="Custom.TLabel", anchor="w")
+            self.barra_estado.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+
+        # El gráfico se crea cuando la ventana ya está en pantalla: matplotlib tarda en cargar
+        self.lienzo = None
+        self.redibujo_pendiente = None
+
+        # La síntesis y la decimación se hacen en un hilo aparte; Tk solo dibuja.
+        # Cada petición lleva un número de generación: las que se quedan viejas
+        # se cancelan o se descartan, así que arrastrar un slider no acumula trabajo.
+        self.trabajador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="onda")
+        self.hilo_audio = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+        self.reproducciones = queue.Queue() # arranques de audio terminados, para avisar de errores
+        self.generacion = 0
+        self.trabajo = None
+        self.resultados = queue.Queue()
+        self.recogida_pendiente = None
+        for var in (self.freq_var, self.amp_var, self.dur_var, self.timbre_var, self.modo_voces_var, self.trazas_var):
+            var.trace_add("write", self.programar_redibujo)
+
+        # Flujo de audio persistente: los controles cambian el sonido mientras suena
+        self.motor = MotorAudio()
+        for var in (self.freq_var, self.amp_var, self.timbre_var, self.modo_voces_var):
+            var.trace_add("write", self.actualizar_motor)
+        self.protocol("WM_DELETE_WINDOW", self.cerrar)
+
+        self.after_idle(self.crear_grafico)
+
+    def crear_panel_voces(self):
+        """Lista de voces (frecuencia, amplitud, fase) que se suman en lugar del tono."""
+        marco = ttk.LabelFrame(self, text="Voces: acordes, batidos e interferencias", style="Custom.TLabelframe")
+        marco.pack(side="top", fill="x", padx=10, pady=(0, 10))
+
+        self.voces = list(VOCES_INICIALES)
+        self.modo_voces_var = tk.BooleanVar(value=False)
+        self.trazas_var = tk.BooleanVar(value=False)
+        self.voz_freq_var = tk.DoubleVar(value=440.0)
+        self.voz_amp_var = tk.DoubleVar(value=0.5)
+        self.voz_fase_var = tk.DoubleVar(value=0.0)
+
+        ttk.Checkbutton(marco, text="Sumar las voces en lugar del tono", variable=self.modo_voces_var, style="Custom.TCheckbutton").grid(row=0, column=0, columnspan=3, sticky="w", padx=5, pady=5)
+        ttk.Checkbutton(marco, text="Mostrar cada voz", variable=self.trazas_var, style="Custom.TCheckbutton").grid(row=0, column=3, columnspan=3, sticky="w", padx=5, pady=5)
+
+        for columna, (texto, var, desde, hasta, paso) in enumerate((
+            ("Hz", self.voz_freq_var, 0.5, 20000, 0.5),
+            ("Amplitud", self.voz_amp_var, 0.0, 1.0, 0.05),
+            ("Fase (°)", self.voz_fase_var, 0, 345, 15),
+        )):
+            ttk.Label(marco, text=texto, style="Custom.TLabel").grid(row=1, column=2 * columna, sticky="e", padx=(5, 2))
+            ttk.Spinbox(marco, from_=desde, to=hasta, increment=paso, textvariable=var, width=8).grid(row=1, column=2 * columna + 1, sticky="w")
+
+        botones = ttk.Frame(marco, style="Custom.TFrame")
+        botones.grid(row=2, column=0, columnspan=6, sticky="w", padx=5, pady=5)
+        ttk.Button(botones, text="➕ Añadir voz", command=self.agregar_voz, style="Custom.TButton").pack(side="left", padx=(0, 10))
+        ttk.Button(botones, text="➖ Quitar la seleccionada", command=self.quitar_voz, style="Custom.TButton").pack(side="left", padx=(0, 10))
+        ttk.Button(botones, text="Vaciar", command=self.vaciar_voces, style="Custom.TButton").pack(side="left")
+
+        self.lista_voces = ttk.Treeview(marco, columns=("frecuencia", "amplitud", "fase"), show="headings", height=4)
+        for columna, texto in (("frecuencia", "Frecuencia (Hz)"), ("amplitud", "Amplitud"), ("fase", "Fase (°)")):
+            self.lista_voces.heading(columna, text=texto)
+            self.lista_voces.column(columna, width=120, anchor="center")
+        self.lista_voces.grid(row=3, column=0, columnspan=6, sticky="ew", padx=5, pady=(0, 5))
+        desplazamiento = ttk.Scrollbar(marco, orient="vertical", command=self.lista_voces.yview)
+        desplazamiento.grid(row=3, column=6, sticky="ns", pady=(0, 5))
+        self.lista_voces.configure(yscrollcommand=desplazamiento.set)
+        marco.columnconfigure(5, weight=1)
+        self.mostrar_voces()
+
+    def mostrar_voces(self):
+        self.lista_voces.delete(*self.lista_voces.get_children())
+        for frecuencia, amplitud, fase in self.voces:
+            self.lista_voces.insert("", "end", values=(f"{frecuencia:g}", f"{amplitud:g}", f"{fase:g}"))
+
+    def cambiar_voces(self, voces):
+        """Sustituye la lista de voces y lo propaga a la tabla, al gráfico y al sonido."""
+        self.voces = voces
+        self.mostrar_voces()
+        self.actualizar_motor()
+        self.programar_redibujo()
+
+    def agregar_voz(self):
+        if len(self.voces) >= VOCES_MAX:
+            messagebox.showinfo("Voces", f"Como mucho se pueden sumar {VOCES_MAX} voces.", parent=self)
+            return
+        try:
+            voz = (self.voz_freq_var.get(), self.voz_amp_var.get(), self.voz_fase_var.get())
+        except tk.TclError: # un Spinbox con texto que no es un número
+            return
+        if voz[0] > 0:
+            self.cambiar_voces(self.voces + [voz])
+
+    def quitar_voz(self):
+        seleccion = {self.lista_voces.index(fila) for fila in self.lista_voces.selection()}
+        if seleccion:
+            self.cambiar_voces([voz for i, voz in enumerate(self.voces) if i not in seleccion])
+
+    def vaciar_voces(self):
+        self.cambiar_voces([])
+
+    def voces_activas(self):
+        """Tupla de voces a sumar, o None si se está usando el tono de los controles."""
+        return tuple(self.voces) if self.modo_voces_var.get() and self.voces else None
+
+    def crear_grafico(self):
+        import matplotlib
+        matplotlib.use('TkAgg')
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         self.fig = Figure(figsize=(5, 4), dpi=100, facecolor=COLOR_FONDO)
         self.ax = self.fig.add_subplot(1, 1, 1)
-        self.ax.set_facecolor(COLOR_FONDO_GRAFICO)
 
         self.lienzo = FigureCanvasTkAgg(self.fig, master=self)
         self.lienzo.get_tk_widget().pack(side="top", fill="both", expand=True, padx=10, pady=10)
 
+        # Los ejes se construyen una sola vez; después solo cambian los datos de la línea
+        self.configurar_ejes()
+        self.linea, = self.ax.plot([], [], color=COLOR_ACENTO, linewidth=2, animated=True)
+        self.lineas_voces = [] # líneas finas de cada voz; mostrar_trazas las crea al necesitarlas
+        self.fondo = None
+        self.ultimo_dibujo = 0.0
+        self.lienzo.mpl_connect("draw_event", self.guardar_fondo)
+
+        self.crear_panel_espectral(Figure, FigureCanvasTkAgg)
         self.actualizar_onda_visual()
 
+    def crear_panel_espectral(self, Figure, FigureCanvasTkAgg):
+        """Espectro y espectrograma en vivo de lo que produce el motor de audio."""
+        from analisis import DB_MIN, AnalizadorEspectral
+
+        self.analizador = AnalizadorEspectral(self.motor.sample_rate)
+        self.motor.monitor = self.analizador.agregar
+
+        self.fig_espectro = Figure(figsize=(5, 2.5), dpi=100, facecolor=COLOR_FONDO)
+        self.ax_espectro = self.fig_espectro.add_subplot(1, 2, 1)
+        self.ax_espectrograma = self.fig_espectro.add_subplot(1, 2, 2)
+        frecuencia_max = self.analizador.frecuencias[-1]
+
+        ax = self.ax_espectro
+        ax.set_facecolor(COLOR_FONDO_GRAFICO)
+        ax.set_title("Espectro", fontsize=11, color=COLOR_TEXTO)
+        ax.set_xlabel("Frecuencia (Hz)", color=COLOR_TEXTO)
+        ax.set_ylabel("dB", color=COLOR_TEXTO)
+        ax.set_xlim(0, frecuencia_max)
+        ax.set_ylim(DB_MIN, 0)
+        ax.grid(True, linestyle='--', alpha=0.6, color=COLOR_ACENTO)
+        self.linea_espectro, = ax.plot(self.analizador.frecuencias, self.analizador.espectro,
+                                       color=COLOR_ACENTO, linewidth=1, animated=True)
+
+        ax = self.ax_espectrograma
+        ax.set_title("Espectrograma", fontsize=11, color=COLOR_TEXTO)
+        ax.set_xlabel("Tiempo (s)", color=COLOR_TEXTO)
+        self.imagen_espectrograma = ax.imshow(
+            self.analizador.espectrograma, origin="lower", aspect="auto", cmap="magma",
+            extent=(-self.analizador.duracion_espectrograma(), 0, 0, frecuencia_max),
+            vmin=DB_MIN, vmax=0, animated=True,
+        )
+        for eje in (self.ax_espectro, self.ax_espectrograma):
+            eje.tick_params(colors=COLOR_TEXTO, which='both', labelsize=8)
+            for spine in eje.spines.values():
+                spine.set_edgecolor(COLOR_TEXTO)
+        self.fig_espectro.tight_layout()
+
+        self.lienzo_espectro = FigureCanvasTkAgg(self.fig_espectro, master=self)
+        self.lienzo_espectro.get_tk_widget().pack(side="top", fill="both", expand=False, padx=10, pady=(0, 10))
+        self.fondo_espectro = None
+        self.lienzo_espectro.mpl_connect("draw_event", self.guardar_fondo_espectro)
+        self.after(INTERVALO_ESPECTRO, self.actualizar_espectro)
+
+    def conectar_analizador(self):
+        """Cambia el analizador por uno a la frecuencia de muestreo actual del motor."""
+        from analisis import AnalizadorEspectral
+
+        self.analizador = AnalizadorEspectral(self.motor.sample_rate)
+        self.motor.monitor = self.analizador.agregar
+        frecuencia_max = self.analizador.frecuencias[-1]
+        self.linea_espectro.set_data(self.analizador.frecuencias, self.analizador.espectro)
+        self.ax_espectro.set_xlim(0, frecuencia_max)
+        self.imagen_espectrograma.set_data(self.analizador.espectrograma)
+        self.imagen_espectrograma.set_extent((-self.analizador.duracion_espectrograma(), 0, 0, frecuencia_max))
+        self.lienzo_espectro.draw_idle() # los ejes son parte del fondo: dibujo completo
+
     def crear_estilo_personalizado(self):
         style = ttk.Style(self)
         style.theme_use('default')
@@ -75,60 +265,227 @@ class AppOndas(tk.Tk):
         style.configure("Custom.TCheckbutton", background=COLOR_FONDO, foreground=COLOR_TEXTO, font=('Helvetica', 11))
         style.map("Custom.TCheckbutton", indicatorcolor=[('selected', COLOR_ACENTO)])
 
-    def actualizar_onda_visual(self):
-        frecuencia = self.freq_var.get()
-        amplitud = self.amp_var.get()
-        duracion = self.dur_var.get()
-        es_compleja = self.timbre_var.get()
-
-        puntos_visuales = 2000
-        tiempo = np.linspace(0, duracion, puntos_visuales)
-        
-        if es_compleja:
-            onda_principal = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-            armonico = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo)
-            onda = onda_principal + armonico
-            max_val = np.max(np.abs(onda))
-            if max_val > 0: onda = (onda / max_val) * amplitud
-        else:
-            onda = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-
-        self.ax.clear()
-        self.ax.plot(tiempo, onda, color=COLOR_ACENTO, linewidth=2)
-        titulo = "Onda Compleja" if es_compleja else "Onda Pura"
-        self.ax.set_title(titulo, fontsize=14, color=COLOR_TEXTO)
+    def configurar_ejes(self):
+        self.ax.set_facecolor(COLOR_FONDO_GRAFICO)
+        self.ax.set_title("Onda Pura", fontsize=14, color=COLOR_TEXTO)
         self.ax.set_xlabel("Tiempo (s)", color=COLOR_TEXTO)
         self.ax.set_ylabel("Amplitud", color=COLOR_TEXTO)
         self.ax.tick_params(colors=COLOR_TEXTO, which='both')
         self.ax.set_ylim(-1.5, 1.5)
-        self.ax.set_xlim(0, duracion)
         self.ax.grid(True, linestyle='--', alpha=0.6, color=COLOR_ACENTO)
         
         for spine in self.ax.spines.values():
             spine.set_edgecolor(COLOR_TEXTO)
 
-        self.lienzo.draw()
+    def guardar_fondo(self, event=None):
+        """Tras cada dibujo completo guardamos el fondo y pintamos encima las líneas animadas."""
+        self.fondo = self.lienzo.copy_from_bbox(self.fig.bbox)
+        self.dibujar_lineas()
+
+    def dibujar_lineas(self):
+        for linea in self.lineas_voces:
+            if linea.get_visible():
+                self.ax.draw_artist(linea)
+        self.ax.draw_artist(self.linea)
+
+    def guardar_fondo_espectro(self, event=None):
+        self.fondo_espectro = self.lienzo_espectro.copy_from_bbox(self.fig_espectro.bbox)
+        self.ax_espectro.draw_artist(self.linea_espectro)
+        self.ax_espectrograma.draw_artist(self.imagen_espectrograma)
+
+    def actualizar_espectro(self):
+        """Procesa los bloques nuevos y repinta solo la línea y la imagen (blitting)."""
+        if self.analizador.sample_rate != self.motor.sample_rate:
+            # El motor abrió el dispositivo a su frecuencia nativa
+            self.conectar_analizador()
+        if self.analizador.procesar() and self.fondo_espectro is not None:
+            self.linea_espectro.set_ydata(self.analizador.espectro)
+            self.imagen_espectrograma.set_data(self.analizador.espectrograma)
+            self.lienzo_espectro.restore_region(self.fondo_espectro)
+            self.ax_espectro.draw_artist(self.linea_espectro)
+            self.ax_espectrograma.draw_artist(self.imagen_espectrograma)
+            self.lienzo_espectro.blit(self.fig_espectro.bbox)
+        self.after(INTERVALO_ESPECTRO, self.actualizar_espectro)
+
+    def programar_redibujo(self, *args):
+        """Agrupa los cambios de los controles en como mucho un redibujo cada INTERVALO_REDIBUJO ms."""
+        if self.lienzo is None or not self.en_vivo_var.get() or self.redibujo_pendiente is not None:
+            return
+        transcurrido = (time.perf_counter() - self.ultimo_dibujo) * 1000
+        espera = max(0, int(INTERVALO_REDIBUJO - transcurrido))
+        self.redibujo_pendiente = self.after(espera, self.actualizar_onda_visual)
+
+    def actualizar_onda_visual(self):
+        if self.lienzo is None:
+            return
+        if self.redibujo_pendiente is not None:
+            self.after_cancel(self.redibujo_pendiente)
+            self.redibujo_pendiente = None
+        self.ultimo_dibujo = time.perf_counter()
+
+        # Las variables de Tk solo se leen desde el hilo de Tk
+        parametros = (self.freq_var.get(), self.amp_var.get(), self.dur_var.get(), self.timbre_var.get(),
+                      max(1, int(self.ax.bbox.width)), self.voces_activas(), self.trazas_var.get())
+        self.generacion += 1
+        if self.trabajo is not None:
+            self.trabajo.cancel() # si aún no ha empezado, ya no empezará
+        self.trabajo = self.trabajador.submit(self.calcular_onda, self.generacion, parametros)
+        self.trabajo.add_done_callback(self.resultados.put)
+        if self.recogida_pendiente is None:
+            self.recogida_pendiente = self.after(INTERVALO_RECOGIDA, self.recoger_resultados)
+
+    def calcular_onda(self, generacion, parametros):
+        """En el hilo trabajador: señal real reducida a mínimo/máximo por columna de píxeles."""
+        if generacion != self.generacion:
+            return None # ya hay una petición más nueva
+        frecuencia, amplitud, duracion, timbre, columnas, voces, trazas = parametros
+        metricas.empezar_interaccion("calculo")
+        if voces:
+            # Todas las voces en una sola operación por bloque; las trazas salen de la misma pasada
+            tiempo, onda, por_voz = voces_para_grafico(voces, duracion, columnas, por_voz=trazas)
+            titulo = "Una voz" if len(voces) == 1 else f"Suma de {len(voces)} voces"
+        else:
+            tiempo, onda = onda_para_grafico(frecuencia, amplitud, duracion, columnas=columnas, timbre=timbre)
+            por_voz = None
+            titulo = "Onda Pura" if timbre == TIMBRE_PURO else f"Onda Compleja ({timbre})"
+        # Los tiempos viajan con el resultado: la barra de estado solo muestra lo que cierra el hilo de Tk
+        registro = metricas.terminar_interaccion()
+        tramos = {"calculo": registro["total_ms"], **registro["tramos"]} if registro is not None else None
+        return generacion, duracion, titulo, tiempo, onda, por_voz, tramos
+
+    def recoger_resultados(self):
+        """En el hilo de Tk: dibuja el resultado más reciente y descarta los viejos."""
+        self.recogida_pendiente = None
+        ultimo = None
+        while True:
+            try:
+                trabajo = self.resultados.get_nowait()
+            except queue.Empty:
+                break
+            if trabajo.cancelled():
+                continue
+            resultado = trabajo.result()
+            if resultado is not None and resultado[0] == self.generacion:
+                ultimo = resultado
+        if ultimo is not None:
+            self.dibujar_onda(*ultimo[1:])
+        if not self.trabajo.done() or not self.resultados.empty():
+            self.recogida_pendiente = self.after(INTERVALO_RECOGIDA, self.recoger_resultados)
+
+    def dibujar_onda(self, duracion, titulo, tiempo, onda, por_voz=None, tramos=None):
+        from graficos import mostrar_trazas
+        metricas.empezar_interaccion("redibujo")
+        metricas.incorporar_tramos(tramos)
+        self.linea.set_data(tiempo, onda)
+        mostrar_trazas(self.ax, self.lineas_voces, tiempo, por_voz, animated=True)
+
+        # El título y el eje X forman parte del fondo: si cambian hace falta un dibujo completo
+        if self.fondo is None or titulo != self.ax.get_title() or self.ax.get_xlim() != (0, duracion):
+            self.ax.set_title(titulo, fontsize=14, color=COLOR_TEXTO)
+            self.ax.set_xlim(0, duracion)
+            with metricas.tramo("render_agg"):
+                self.lienzo.draw()
+        else:
+            with metricas.tramo("blit"):
+                self.lienzo.restore_region(self.fondo)
+                self.dibujar_lineas()
+                self.lienzo.blit(self.fig.bbox)
+        self.mostrar_metricas()
+
+    def mostrar_metricas(self):
+        """Cierra la interacción en curso y pone sus tiempos en la barra de estado."""
+        registro = metricas.terminar_interaccion()
+        if self.barra_estado is not None and registro is not None:
+            self.barra_estado.configure(text=metricas.texto_interaccion(registro))
+
+    def actualizar_motor(self, *args):
+        self.motor.actualizar(self.freq_var.get(), self.amp_var.get(), timbre=self.timbre_var.get())
+        self.motor.actualizar_voces(self.voces_activas())
 
     def reproducir_sonido(self):
-        frecuencia = self.freq_var.get()
-        amplitud = self.amp_var.get()
-        duracion = self.dur_var.get()
-        es_compleja = self.timbre_var.get()
-
-        sample_rate = 44100
-        puntos_audio = int(duracion * sample_rate)
-        tiempo = np.linspace(0, duracion, puntos_audio, endpoint=False)
-        
-        if es_compleja:
-            onda_principal = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-            armonico = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo)
-            onda = onda_principal + armonico
-            max_val = np.max(np.abs(onda))
-            if max_val > 0: onda = (onda / max_val) * amplitud
+        self.actualizar_motor()
+        # Abrir el dispositivo la primera vez puede tardar: se hace fuera del hilo de Tk
+        futuro = self.hilo_audio.submit(self.iniciar_reproduccion, self.dur_var.get())
+        futuro.add_done_callback(self.reproducciones.put)
+        self.after(INTERVALO_RECOGIDA, self.recoger_reproduccion)
+
+    def iniciar_reproduccion(self, duracion):
+        """En el hilo de audio: arranca el sonido y devuelve los tiempos del arranque."""
+        metricas.empezar_interaccion("reproducir")
+        try:
+            with metricas.tramo("inicio_audio"):
+                self.motor.reproducir(duracion)
+        finally:
+            registro = metricas.terminar_interaccion()
+        return registro
+
+    def recoger_reproduccion(self):
+        """En el hilo de Tk: avisa si no se pudo reproducir o muestra los tiempos del arranque."""
+        try:
+            futuro = self.reproducciones.get_nowait()
+        except queue.Empty:
+            self.after(INTERVALO_RECOGIDA, self.recoger_reproduccion)
+            return
+        if futuro.cancelled():
+            return
+        error = futuro.exception()
+        if error is not None:
+            messagebox.showerror("Reproducir", f"No se puede reproducir el sonido:\n{error}", parent=self)
+        elif self.barra_estado is not None and futuro.result() is not None:
+            self.barra_estado.configure(text=metricas.texto_interaccion(futuro.result()))
+
+    def exportar_wav(self):
+        """Guarda el tono actual (o la mezcla de voces) en un WAV de la duración que se pida (sin el límite del slider)."""
+        duracion = simpledialog.askfloat(
+            "Exportar WAV", "Duración en segundos (p. ej. 1800 para media hora):",
+            initialvalue=round(self.dur_var.get(), 2), minvalue=0.01, parent=self,
+        )
+        if duracion is None:
+            return
+        voces = self.voces_activas()
+        ruta = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".wav", filetypes=[("Audio WAV", "*.wav")],
+            initialfile=f"voces_{len(voces)}.wav" if voces else f"tono_{self.freq_var.get():.0f}Hz.wav",
+        )
+        if not ruta:
+            return
+
+        from exportacion import exportar_tono
+        parametros = (ruta, self.freq_var.get(), self.amp_var.get(), duracion)
+        timbre = self.timbre_var.get()
+        self.exportacion = {"progreso": 0.0, "error": None, "terminada": False}
+
+        def trabajar():
+            # Se escribe en otro hilo: la ventana sigue respondiendo durante exportaciones largas
+            try:
+                exportar_tono(*parametros, timbre=timbre, voces=voces,
+                              progreso=lambda fraccion: self.exportacion.update(progreso=fraccion))
+            except Exception as error: # cualquier fallo se muestra; si no, el botón quedaría deshabilitado
+                self.exportacion["error"] = error
+            finally:
+                self.exportacion["terminada"] = True
+
+        self.boton_exportar.state(["disabled"])
+        threading.Thread(target=trabajar, name="exportacion-wav", daemon=True).start()
+        self.vigilar_exportacion(ruta)
+
+    def vigilar_exportacion(self, ruta):
+        if not self.exportacion["terminada"]:
+            self.boton_exportar.configure(text=f"💾 Exportando… {self.exportacion['progreso']:.0%}")
+            self.after(100, self.vigilar_exportacion, ruta)
+            return
+        self.boton_exportar.configure(text="💾 Exportar WAV…")
+        self.boton_exportar.state(["!disabled"])
+        if self.exportacion["error"] is not None:
+            messagebox.showerror("Exportar WAV", f"No se pudo exportar:\n{self.exportacion['error']}", parent=self)
         else:
-            onda = amplitud * np.sin(2 * np.pi * frecuencia * tiempo)
-        
-        sd.play(onda.astype(np.float32), sample_rate)
+            messagebox.showinfo("Exportar WAV", f"Guardado en:\n{ruta}", parent=self)
+
+    def cerrar(self):
+        self.trabajador.shutdown(wait=False, cancel_futures=True)
+        self.hilo_audio.shutdown(wait=True, cancel_futures=True)
+        self.motor.cerrar()
+        self.destroy()
 
 if __name__ == "__main__":
     app = AppOndas()
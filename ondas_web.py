@@ -1,78 +1,146 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import sounddevice as sd
+import metricas
+from metricas_web import panel_depuracion
+from cache_disco import cache_disco
+from decimacion import onda_para_grafico, voces_para_grafico
+from motor_audio import MotorAudio
+from sintesis import VOCES_MAX
+from timbres import TIMBRE_PURO, TIMBRES
+
+# Dos voces casi iguales: batidos de 1 Hz
+VOCES_INICIALES = [
+    {"Frecuencia (Hz)": 10.0, "Amplitud": 0.5, "Fase (°)": 0.0},
+    {"Frecuencia (Hz)": 11.0, "Amplitud": 0.5, "Fase (°)": 0.0},
+]
 
 # --- Configuración de la página web ---
 st.set_page_config(page_title="Visualizador de Ondas", layout="wide")
+metricas.empezar_interaccion("ondas_web")
+
+# Un solo motor por proceso: suena por el único altavoz del servidor. Los
+# parámetros son de cada sesión y se le pasan al pulsar "Reproducir", así que
+# mover un control en una sesión no cambia lo que otra ha puesto a sonar.
+@st.cache_resource
+def obtener_motor():
+    return MotorAudio()
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def imagen_onda(frecuencia, amplitud, duracion, timbre):
+    """PNG del gráfico para unos valores de los controles (se cachea entre sesiones y en disco)."""
+    def dibujar():
+        from graficos import columnas_png, png_onda # matplotlib solo se carga al primer dibujo
+        # Señal real reducida a mínimo/máximo por columna de píxeles del gráfico
+        tiempo_visual, onda_v = onda_para_grafico(frecuencia, amplitud, duracion, columnas=columnas_png(), timbre=timbre)
+        titulo = "Onda Pura" if timbre == TIMBRE_PURO else f"Onda Compleja ({timbre})"
+        # Dibujar el gráfico en la figura reutilizable del proceso (sin pyplot)
+        return png_onda(tiempo_visual, onda_v, titulo, duracion)
+    # Si otro proceso (u otro arranque) ya lo dibujó, se sirve el PNG del disco
+    return bytes(cache_disco.obtener(("png", frecuencia, amplitud, duracion, timbre), dibujar))
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def espectro_onda(frecuencia, amplitud, duracion, timbre):
+    """Espectro en dB del clip, con el mismo análisis que el panel en vivo de la app de escritorio."""
+    from analisis import espectro_de
+    from sintesis import onda_audio
+    frecuencias, espectro = espectro_de(onda_audio(frecuencia, amplitud, duracion, timbre=timbre))
+    return {"Frecuencia (Hz)": frecuencias, "Nivel (dB)": espectro.copy()}
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def imagen_voces(voces, duracion, trazas):
+    """PNG de la mezcla de `voces` y, con `trazas`, de cada voz con una línea fina."""
+    def dibujar():
+        from graficos import columnas_png, png_onda
+        tiempo, mezcla, por_voz = voces_para_grafico(voces, duracion, columnas_png(), por_voz=trazas)
+        titulo = "Una voz" if len(voces) == 1 else f"Suma de {len(voces)} voces"
+        return png_onda(tiempo, mezcla, titulo, duracion, por_voz)
+    return bytes(cache_disco.obtener(("png_voces", voces, duracion, trazas), dibujar))
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def espectro_voces(voces, duracion):
+    """Espectro en dB de la mezcla: un pico por voz."""
+    from analisis import espectro_de
+    from sintesis import onda_voces
+    frecuencias, espectro = espectro_de(onda_voces(voces, duracion))
+    return {"Frecuencia (Hz)": frecuencias, "Nivel (dB)": espectro.copy()}
 
-# --- PALETA DE COLORES ---
-COLOR_FONDO_GRAFICO = "#F5BABB"
-COLOR_ACENTO = "#568F87"
-COLOR_TEXTO = "#064232"
+def leer_voces(filas):
+    """Filas completas de la tabla como tupla de (frecuencia, amplitud, fase), como mucho VOCES_MAX."""
+    columnas = ("Frecuencia (Hz)", "Amplitud", "Fase (°)")
+    voces = tuple(
+        tuple(float(fila[c]) for c in columnas) for fila in filas
+        # Las filas recién añadidas llegan con celdas vacías (None o NaN)
+        if all(fila.get(c) is not None and fila[c] == fila[c] for c in columnas) and fila["Frecuencia (Hz)"] > 0
+    )
+    if len(voces) > VOCES_MAX:
+        st.warning(f"Solo se usan las primeras {VOCES_MAX} voces.")
+    return voces[:VOCES_MAX]
 
 st.title("🌊 Visualizador de Ondas Sonoras Interactivo")
-st.write("Usa los controles de la barra lateral para crear y explorar las cualidades del sonido.")
+st.write("Usa los controles para crear y explorar las cualidades del sonido.")
 
-# --- Barra lateral con los controles ---
-with st.sidebar:
+# --- Gráfico con sus controles ---
+# Es un fragmento: mover un control solo vuelve a ejecutar esta función (y
+# solo se envía al navegador lo que hay dentro), no la página entera
+@st.fragment
+def grafico():
+    # Con la página entera, sus tramos van al registro de "ondas_web" (que cierra
+    # panel_depuracion); solo cuando el fragmento se ejecuta solo tiene registro propio
+    propia = not metricas.interaccion_abierta()
+    if propia:
+        metricas.empezar_interaccion("ondas_web/grafico")
     st.header("Parámetros de la Onda")
+    frecuencia = st.slider("Tono (Hz)", min_value=1.0, max_value=50.0, value=10.0, step=0.5, key="frecuencia")
+    amplitud = st.slider("Intensidad (Volumen)", min_value=0.1, max_value=1.0, value=0.8, key="amplitud")
+    duracion = st.slider("Duración (s)", min_value=0.1, max_value=3.0, value=1.0, key="duracion")
+    timbre = st.selectbox("Timbre", list(TIMBRES), key="timbre")
+
+    # Modo de varias voces: la tabla sustituye al tono de los controles de arriba
+    voces = ()
+    if st.toggle("Sumar varias voces (acordes, batidos, interferencias)", key="modo_voces"):
+        filas = st.data_editor(
+            VOCES_INICIALES, num_rows="dynamic", key="voces", width="stretch",
+            column_config={
+                "Frecuencia (Hz)": st.column_config.NumberColumn(min_value=0.1, max_value=20000.0, step=0.5),
+                "Amplitud": st.column_config.NumberColumn(min_value=0.0, max_value=1.0, step=0.05),
+                "Fase (°)": st.column_config.NumberColumn(min_value=0.0, max_value=360.0, step=15.0),
+            },
+        )
+        voces = leer_voces(filas)
+        trazas = st.checkbox("Mostrar cada voz", key="trazas")
+    # Para el fragmento de reproducción, que no vuelve a leer la tabla
+    st.session_state.voces_activas = voces
+
+    st.header("Visualización de la Onda")
+    if voces:
+        st.image(imagen_voces(voces, duracion, trazas), width="stretch")
+    else:
+        st.image(imagen_onda(frecuencia, amplitud, duracion, timbre), width="stretch")
 
-    frecuencia = st.slider("Tono (Hz)", min_value=1.0, max_value=50.0, value=10.0, step=0.5)
-    amplitud = st.slider("Intensidad (Volumen)", min_value=0.1, max_value=1.0, value=0.8)
-    duracion = st.slider("Duración (s)", min_value=0.1, max_value=3.0, value=1.0)
-    es_compleja = st.checkbox("Añadir armónico (Timbre complejo)")
+    st.header("Espectro")
+    espectro = espectro_voces(voces, duracion) if voces else espectro_onda(frecuencia, amplitud, duracion, timbre)
+    st.line_chart(espectro, x="Frecuencia (Hz)", y="Nivel (dB)")
+    if propia:
+        metricas.terminar_interaccion()
 
-    # Botón para reproducir el sonido
+# --- Reproducción en la barra lateral ---
+# Otro fragmento: pulsar el botón no vuelve a dibujar el gráfico. Lee los
+# valores de los controles de session_state.
+@st.fragment
+def reproduccion():
+    st.header("Reproducción")
     if st.button("▶️ Reproducir Sonido"):
-        # Generar datos para el audio (alta calidad)
-        sample_rate = 44100
-        puntos_audio = int(duracion * sample_rate)
-        tiempo_audio = np.linspace(0, duracion, puntos_audio, endpoint=False)
-
-        if es_compleja:
-            onda_principal = amplitud * np.sin(2 * np.pi * frecuencia * tiempo_audio)
-            armonico = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo_audio)
-            onda_audio = onda_principal + armonico
-            max_val = np.max(np.abs(onda_audio))
-            if max_val > 0: onda_audio = (onda_audio / max_val) * amplitud
-        else:
-            onda_audio = amplitud * np.sin(2 * np.pi * frecuencia * tiempo_audio)
-
-        sd.play(onda_audio.astype(np.float32), sample_rate)
-
-# --- Área principal para el gráfico ---
-st.header("Visualización de la Onda")
-
-# Generar datos para el gráfico (baja densidad para que se vea bien)
-puntos_visuales = 2000
-tiempo_visual = np.linspace(0, duracion, puntos_visuales)
-
-if es_compleja:
-    onda_principal_v = amplitud * np.sin(2 * np.pi * frecuencia * tiempo_visual)
-    armonico_v = (amplitud / 3) * np.sin(2 * np.pi * (frecuencia * 2) * tiempo_visual)
-    onda_visual = onda_principal_v + armonico_v
-    max_val_v = np.max(np.abs(onda_visual))
-    if max_val_v > 0: onda_visual = (onda_visual / max_val_v) * amplitud
-    titulo = "Onda Compleja"
-else:
-    onda_visual = amplitud * np.sin(2 * np.pi * frecuencia * tiempo_visual)
-    titulo = "Onda Pura"
-
-# Dibujar el gráfico
-fig, ax = plt.subplots()
-fig.patch.set_facecolor('#FFF5F2') # Fondo exterior
-ax.set_facecolor(COLOR_FONDO_GRAFICO) # Fondo interior
-ax.plot(tiempo_visual, onda_visual, color=COLOR_ACENTO, linewidth=2)
-
-ax.set_title(titulo, fontsize=14, color=COLOR_TEXTO)
-ax.set_xlabel("Tiempo (s)", color=COLOR_TEXTO)
-ax.set_ylabel("Amplitud", color=COLOR_TEXTO)
-ax.tick_params(colors=COLOR_TEXTO, which='both')
-ax.set_ylim(-1.5, 1.5)
-ax.set_xlim(0, duracion)
-ax.grid(True, linestyle='--', alpha=0.6, color=COLOR_ACENTO)
-for spine in ax.spines.values():
-    spine.set_edgecolor(COLOR_TEXTO)
-
-st.pyplot(fig)
\ No newline at end of file
+        estado = st.session_state
+        motor = obtener_motor()
+        with metricas.tramo("reproducir"):
+            motor.actualizar(estado.frecuencia, estado.amplitud, timbre=estado.timbre)
+            motor.actualizar_voces(estado.get("voces_activas", ()))
+            try:
+                motor.reproducir(estado.duracion)
+            except OSError as error: # sin PortAudio o sin tarjeta de sonido en el servidor
+                st.warning(f"No se puede reproducir el sonido en este equipo ({error}).")
+
+grafico()
+with st.sidebar:
+    reproduccion()
+
+panel_depuracion()
@@ -0,0 +1,85 @@
+import logging
+import threading
+from collections import deque
+
+from audio_web import clips_compactos
+
+# --- Configuración de la preparación anticipada ---
+PREGUNTAS_ADELANTADAS = 8
+# Si preparar falla, el hilo espera antes de reintentar (el doble cada vez, hasta el máximo)
+ESPERA_TRAS_ERROR = 0.5 # s
+ESPERA_MAXIMA = 30.0 # s
+
+registro = logging.getLogger(__name__)
+
+
+class PreparadorPreguntas:
+    """
+    Mantiene listas las próximas preguntas de un juego, con su audio ya codificado.
+
+    `sortear()` devuelve un dict con al menos "frecuencia" y "amplitud". Un hilo
+    de fondo rellena la cola hasta `adelanto` preguntas: sortea las que faltan,
+    las sintetiza todas con una sola llamada vectorizada y añade a cada una
+    "audio" (bytes) y "formato" (tipo MIME). `siguiente()` solo saca la primera
+    de la cola, así que al pulsar "Siguiente" no se sintetiza nada. Con
+    `sample_rate`, todos los clips se codifican a esa frecuencia de muestreo.
+    """
+
+    def __init__(self, sortear, duracion, adelanto=PREGUNTAS_ADELANTADAS, sample_rate=None):
+        self.sortear = sortear
+        self.duracion = duracion
+        self.adelanto = adelanto
+        self.sample_rate = sample_rate
+        self.listas = deque()
+        self._condicion = threading.Condition()
+        self._hilo = None
+
+    def _preparar(self, n):
+        """Sortea `n` preguntas y codifica su audio en un solo lote."""
+        preguntas = [self.sortear() for _ in range(n)]
+        clips = clips_compactos([(p["frecuencia"], p["amplitud"]) for p in preguntas], self.duracion,
+                                sample_rate=self.sample_rate)
+        for pregunta, (audio, formato) in zip(preguntas, clips):
+            pregunta["audio"] = audio
+            pregunta["formato"] = formato
+        return preguntas
+
+    def _trabajar(self):
+        espera = ESPERA_TRAS_ERROR
+        while True:
+            with self._condicion:
+                while len(self.listas) >= self.adelanto:
+                    self._condicion.wait()
+                faltan = self.adelanto - len(self.listas)
+            # Se sintetiza sin el cerrojo: mientras tanto se pueden sacar preguntas
+            try:
+                preparadas = self._preparar(faltan)
+            except Exception:
+                # Un error no debe parar el hilo: siguiente() prepararía en línea para siempre
+                registro.exception("No se pudieron preparar %d preguntas; reintento en %.1f s", faltan, espera)
+                with self._condicion:
+                    self._condicion.wait(espera)
+                espera = min(2 * espera, ESPERA_MAXIMA)
+                continue
+            espera = ESPERA_TRAS_ERROR
+            with self._condicion:
+                self.listas.extend(preparadas)
+                self._condicion.notify_all()
+
+    def iniciar(self):
+        """Arranca el hilo de fondo (la primera vez, o de nuevo si se ha parado)."""
+        with self._condicion:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._trabajar, name="preparador-preguntas", daemon=True)
+                self._hilo.start()
+
+    def siguiente(self):
+        """Devuelve la próxima pregunta preparada y avisa al hilo para que la reponga."""
+        self.iniciar()
+        with self._condicion:
+            if self.listas:
+                pregunta = self.listas.popleft()
+                self._condicion.notify_all()
+                return pregunta
+        # Cola vacía (primer uso o ráfaga de clics): la preparamos aquí mismo
+        return self._preparar(1)[0]
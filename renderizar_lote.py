@@ -0,0 +1,199 @@
+"""
+Genera en lote los WAV y PNG de un barrido de parámetros, sin Tk ni tarjeta de sonido.
+
+El barrido se describe en un JSON con listas (o rangos) de frecuencias,
+amplitudes, duraciones y timbres; se genera una combinación por cada elemento
+del producto cartesiano. El trabajo se reparte entre todos los núcleos con un
+ProcessPoolExecutor, los archivos que ya están al día no se vuelven a generar y
+al final se escribe manifiesto.json con lo que hay en la carpeta de salida.
+
+Ejemplo de barrido:
+    {
+        "frecuencias": {"desde": 110, "hasta": 880, "pasos": 4, "escala": "log"},
+        "amplitudes": [0.5, 1.0],
+        "duraciones": [1.0],
+        "timbres": ["Pura", "Cuadrada", "Flauta"],
+        "formatos": ["wav", "png"]
+    }
+
+Uso:
+    python renderizar_lote.py barrido.json --salida clips
+    python renderizar_lote.py --frecuencias 220 440 --timbres Pura Violín --salida clips
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Un archivo generado está al día si es más reciente que todos estos módulos
+DEPENDENCIAS = ("sintesis.py", "nucleos.py", "timbres.py", "decimacion.py", "graficos.py", "audio_web.py",
+                "cache_disco.py")
+
+BARRIDO_POR_DEFECTO = {
+    "frecuencias": [220.0, 440.0, 880.0],
+    "amplitudes": [0.8],
+    "duraciones": [1.0],
+    "timbres": ["Pura"],
+    "formatos": ["wav", "png"],
+}
+
+
+def valores(especificacion):
+    """Una lista tal cual, o un rango {"desde", "hasta", "pasos", "escala": "lineal"|"log"}."""
+    if isinstance(especificacion, dict):
+        desde, hasta, pasos = especificacion["desde"], especificacion["hasta"], especificacion.get("pasos", 2)
+        if especificacion.get("escala", "lineal") == "log":
+            return [round(float(v), 6) for v in np.geomspace(desde, hasta, pasos)]
+        return [round(float(v), 6) for v in np.linspace(desde, hasta, pasos)]
+    if isinstance(especificacion, (int, float, str)):
+        return [especificacion]
+    return list(especificacion)
+
+
+def combinaciones(barrido):
+    """Producto cartesiano del barrido: [(frecuencia, amplitud, duracion, timbre)]."""
+    return list(itertools.product(
+        [float(f) for f in valores(barrido["frecuencias"])],
+        [float(a) for a in valores(barrido["amplitudes"])],
+        [float(d) for d in valores(barrido["duraciones"])],
+        valores(barrido["timbres"]),
+    ))
+
+
+def _numero(valor):
+    """Con 3 decimales fijos (sin ceros al final): 440, 1000.123, 0.8."""
+    return f"{valor:.3f}".rstrip("0").rstrip(".")
+
+
+def nombre_base(frecuencia, amplitud, duracion, timbre):
+    """Nombre de archivo estable y legible, sin espacios ni símbolos."""
+    timbre = "".join(c if c.isalnum() else "_" for c in timbre.lower()).strip("_")
+    return f"{timbre}_{_numero(frecuencia)}Hz_a{_numero(amplitud)}_d{_numero(duracion)}s"
+
+
+def modificacion_codigo():
+    return max(os.path.getmtime(os.path.join(RAIZ, modulo)) for modulo in DEPENDENCIAS)
+
+
+def al_dia(ruta, referencia):
+    return os.path.exists(ruta) and os.path.getmtime(ruta) >= referencia
+
+
+# --- Trabajo de cada proceso ---
+
+def _iniciar_proceso():
+    os.environ["MPLBACKEND"] = "Agg" # por si algo llegara a importar pyplot
+    sys.path.insert(0, RAIZ)
+
+
+def renderizar(tarea):
+    """Genera los archivos de una combinación que no estén al día. Devuelve su entrada del manifiesto."""
+    from audio_web import codificar_wav
+    from archivos import escribir_atomico
+    from sintesis import onda_audio
+    from timbres import TIMBRE_PURO
+
+    (frecuencia, amplitud, duracion, timbre), salida, formatos, referencia = tarea
+    base = nombre_base(frecuencia, amplitud, duracion, timbre)
+    entrada = {"frecuencia": frecuencia, "amplitud": amplitud, "duracion": duracion, "timbre": timbre,
+               "archivos": {}, "generados": []}
+
+    if "wav" in formatos:
+        ruta = os.path.join(salida, base + ".wav")
+        if not al_dia(ruta, referencia):
+            onda = onda_audio(frecuencia, amplitud, duracion, dtype=np.int16, timbre=timbre)
+            escribir_atomico(ruta, codificar_wav(onda))
+            entrada["generados"].append("wav")
+        entrada["archivos"]["wav"] = os.path.basename(ruta)
+
+    if "png" in formatos:
+        ruta = os.path.join(salida, base + ".png")
+        if not al_dia(ruta, referencia):
+            from decimacion import onda_para_grafico
+            from graficos import columnas_png, png_onda
+            tiempo, onda = onda_para_grafico(frecuencia, amplitud, duracion, columnas=columnas_png(), timbre=timbre)
+            titulo = "Onda Pura" if timbre == TIMBRE_PURO else f"Onda Compleja ({timbre})"
+            escribir_atomico(ruta, png_onda(tiempo, onda, titulo, duracion))
+            entrada["generados"].append("png")
+        entrada["archivos"]["png"] = os.path.basename(ruta)
+    return entrada
+
+
+def renderizar_barrido(barrido, salida, procesos=None):
+    """Reparte el barrido entre `procesos` (por defecto, todos los núcleos). Devuelve el manifiesto."""
+    from timbres import TIMBRES
+
+    tareas = combinaciones(barrido)
+    desconocidos = sorted({t for *_, t in tareas if t not in TIMBRES})
+    if desconocidos:
+        raise ValueError(f"Timbres desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(TIMBRES)}")
+    # Dos valores que solo difieren más allá del tercer decimal se sobrescribirían
+    nombres = collections.Counter(nombre_base(*t) for t in tareas)
+    repetidos = sorted(nombre for nombre, veces in nombres.items() if veces > 1)
+    if repetidos:
+        raise ValueError(f"Combinaciones con el mismo nombre de archivo (valores a menos de 0.001): "
+                         f"{', '.join(repetidos[:5])}{'...' if len(repetidos) > 5 else ''}")
+    os.makedirs(salida, exist_ok=True)
+    formatos = tuple(barrido.get("formatos", BARRIDO_POR_DEFECTO["formatos"]))
+    referencia = modificacion_codigo()
+
+    procesos = procesos or os.cpu_count() or 1
+    # Bloques de varias tareas para no pagar una ida y vuelta entre procesos por clip
+    bloque = max(1, len(tareas) // (procesos * 4))
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as grupo:
+        entradas = list(grupo.map(renderizar, [(t, salida, formatos, referencia) for t in tareas], chunksize=bloque))
+    segundos = time.perf_counter() - inicio
+
+    manifiesto = {
+        "barrido": barrido,
+        "procesos": procesos,
+        "segundos": round(segundos, 3),
+        "generados": sum(len(e["generados"]) for e in entradas),
+        "al_dia": sum(len(e["archivos"]) - len(e["generados"]) for e in entradas),
+        "clips": entradas,
+    }
+    with open(os.path.join(salida, "manifiesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    return manifiesto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("barrido", nargs="?", help="JSON con el barrido (si no, se usa el de por defecto)")
+    parser.add_argument("--salida", default="clips", help="carpeta de salida")
+    parser.add_argument("--procesos", type=int, help="procesos de trabajo (por defecto, todos los núcleos)")
+    parser.add_argument("--frecuencias", type=float, nargs="+")
+    parser.add_argument("--amplitudes", type=float, nargs="+")
+    parser.add_argument("--duraciones", type=float, nargs="+")
+    parser.add_argument("--timbres", nargs="+")
+    parser.add_argument("--formatos", nargs="+", choices=("wav", "png"))
+    args = parser.parse_args()
+
+    barrido = dict(BARRIDO_POR_DEFECTO)
+    if args.barrido:
+        with open(args.barrido, encoding="utf-8") as f:
+            barrido.update(json.load(f))
+    for clave in ("frecuencias", "amplitudes", "duraciones", "timbres", "formatos"):
+        if getattr(args, clave):
+            barrido[clave] = getattr(args, clave)
+
+    try:
+        manifiesto = renderizar_barrido(barrido, args.salida, args.procesos)
+    except ValueError as error:
+        sys.exit(str(error))
+    ritmo = len(manifiesto["clips"]) / manifiesto["segundos"] if manifiesto["segundos"] else 0
+    print(f"{len(manifiesto['clips'])} combinaciones en {manifiesto['segundos']:.2f} s con {manifiesto['procesos']} procesos "
+          f"({ritmo:.1f}/s): {manifiesto['generados']} archivos generados, {manifiesto['al_dia']} ya al día")
+
+
+if __name__ == "__main__":
+    main()
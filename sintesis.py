@@ -0,0 +1,477 @@
+import contextlib
+import importlib.util
+import os
+import threading
+
+import numpy as np
+
+from metricas import tramo
+from timbres import armonicos_audibles, leer_tabla, resolver, tabla_onda
+
+# --- Configuración común de la síntesis ---
+SAMPLE_RATE = 44100 # Muestras por segundo para el audio
+ESCALA_16BIT = 32767
+VOCES_MAX = 48 # voces simultáneas en el modo de acordes, batidos e interferencias
+ELEMENTOS_BLOQUE_VOCES = 1 << 16 # voces × muestras por bloque: cabe en la caché L2
+
+DOS_PI = 2 * np.pi
+
+# --- Backend de generar_onda ---
+# "numba": los núcleos compilados de nucleos.py, una sola pasada por muestra. Se
+# elige solo si Numba está instalado; VISUALIZADOR_NUCLEOS=numpy lo evita.
+BACKENDS = ("numba", "numpy")
+
+
+def _backend_por_defecto():
+    if os.environ.get("VISUALIZADOR_NUCLEOS", "").lower() == "numpy":
+        return "numpy"
+    # Sin importarlo: Numba solo se carga (y compila) en la primera síntesis
+    return "numba" if importlib.util.find_spec("numba") is not None else "numpy"
+
+
+backend = _backend_por_defecto()
+
+
+def usar_backend(nombre):
+    """Cambia el backend de generar_onda en todo el proceso; devuelve el anterior."""
+    global backend
+    if nombre not in BACKENDS:
+        raise ValueError(f"backend desconocido: {nombre!r} (se esperaba uno de {BACKENDS})")
+    if nombre == "numba" and importlib.util.find_spec("numba") is None:
+        raise RuntimeError("Numba no está instalado")
+    anterior, backend = backend, nombre
+    return anterior
+
+# Búferes de trabajo reutilizados entre llamadas. No son por hilo: Streamlit
+# ejecuta cada rerun en un hilo nuevo, así que unos búferes por hilo no se
+# reutilizarían nunca (y se acumularían). Se guardan en una reserva del proceso;
+# cada llamada toma un juego (o crea otro si todos están en uso) y lo devuelve
+# al terminar, así que nunca hay más juegos que llamadas simultáneas. Los juegos
+# de más de CAPACIDAD_MAXIMA_RESERVA muestras (~10 MiB, unos 6 s a 44100 Hz) no
+# se guardan: un clip largo ocasional no deja la reserva ocupando esa memoria.
+CAPACIDAD_MAXIMA_RESERVA = 1 << 18
+_reserva_buferes = []
+_lock_reserva = threading.Lock()
+
+
+@contextlib.contextmanager
+def _buffers_trabajo(n):
+    """Presta la rampa 0..n-1 y los búferes auxiliares, con al menos n muestras."""
+    with _lock_reserva:
+        juego = _reserva_buferes.pop() if _reserva_buferes else None
+    if juego is None or juego[0].size < n:
+        capacidad = max(n, min(2 * (0 if juego is None else juego[0].size), CAPACIDAD_MAXIMA_RESERVA))
+        juego = (np.arange(capacidad, dtype=np.float64), np.empty(capacidad, dtype=np.float64),
+                 np.empty(capacidad, dtype=np.float64), np.empty(capacidad, dtype=np.float32),
+                 np.empty(capacidad, dtype=np.float32), np.empty(capacidad, dtype=np.intp))
+    try:
+        yield tuple(buffer[:n] for buffer in juego)
+    finally:
+        if juego[0].size <= CAPACIDAD_MAXIMA_RESERVA:
+            with _lock_reserva:
+                _reserva_buferes.append(juego)
+
+
+def muestras_audio(duracion, sample_rate=SAMPLE_RATE):
+    """Número de muestras de un clip de `duracion` segundos."""
+    return int(duracion * sample_rate)
+
+
+def generar_onda(frecuencia, amplitud, n_muestras, paso, es_compleja=False, out=None, dtype=np.float32, timbre=None):
+    """
+    Sintetiza una onda senoidal (con armónico 2× opcional) directamente en `out`.
+
+    Con `timbre` (un nombre de timbres.TIMBRES o un Timbre) la onda se lee de la
+    tabla de un periodo de ese timbre, limitada a los armónicos por debajo de
+    Nyquist: el coste no depende del número de armónicos.
+
+    `paso` es el tiempo entre muestras. La fase se acumula en ciclos y se envuelve
+    a media vuelta antes del seno, de modo que la precisión no depende de la duración.
+    Todo el cálculo intermedio se hace in-place sobre búferes reutilizados; la única
+    escritura en `out` es la pasada final de escalado (float32, int16, ...).
+    Con dtype entero la onda se escala a 16 bits, como en los archivos WAV.
+    Si Numba está instalado, todo ello es una única pasada (ver nucleos.py).
+    """
+    if out is None:
+        out = np.empty(n_muestras, dtype=dtype)
+    if n_muestras == 0:
+        return out
+
+    timbre = resolver(timbre)
+    if backend == "numba":
+        from nucleos import onda
+        escala = amplitud * (ESCALA_16BIT if np.issubdtype(out.dtype, np.integer) else 1)
+        tabla = pendientes = None
+        if timbre is not None:
+            tabla, pendientes = tabla_onda(timbre, armonicos_audibles(frecuencia, 1 / paso))
+        return onda(out, frecuencia * paso, escala, es_compleja, tabla, pendientes)
+
+    with _buffers_trabajo(n_muestras) as buferes:
+        return _onda_numpy(frecuencia, amplitud, paso, es_compleja, out, timbre, *buferes)
+
+
+def _onda_numpy(frecuencia, amplitud, paso, es_compleja, out, timbre, rampa, ciclos, vueltas, fase, aux, indices):
+    """El backend de NumPy de generar_onda, sobre búferes prestados."""
+    if timbre is not None:
+        tabla, pendientes = tabla_onda(timbre, armonicos_audibles(frecuencia, 1 / paso))
+        np.multiply(rampa, frecuencia * paso, out=ciclos)
+        leer_tabla(tabla, pendientes, ciclos, vueltas, indices, fase, aux)
+        escala = amplitud * (ESCALA_16BIT if np.issubdtype(out.dtype, np.integer) else 1)
+        np.multiply(fase, escala, out=out, casting="unsafe")
+        return out
+
+    # Acumulador de fase en float64: ciclos transcurridos en cada muestra,
+    # envueltos a [-0.5, 0.5] para que el seno en float32 no pierda precisión
+    np.multiply(rampa, frecuencia * paso, out=ciclos)
+    np.rint(ciclos, out=vueltas)
+    np.subtract(ciclos, vueltas, out=ciclos)
+    np.multiply(ciclos, DOS_PI, out=fase, casting="same_kind")
+
+    escala = amplitud
+    if es_compleja:
+        # Armónico al doble de frecuencia con un tercio de amplitud
+        np.multiply(fase, 2.0, out=aux)
+        np.sin(aux, out=aux)
+        np.sin(fase, out=fase)
+        np.multiply(aux, 1 / 3, out=aux)
+        np.add(fase, aux, out=fase)
+        # Normalizamos al pico para conservar la amplitud pedida
+        max_val = max(fase.max(), -fase.min())
+        if max_val > 0:
+            escala = amplitud / max_val
+    else:
+        np.sin(fase, out=fase)
+
+    if np.issubdtype(out.dtype, np.integer):
+        escala *= ESCALA_16BIT
+    np.multiply(fase, escala, out=out, casting="unsafe")
+    return out
+
+
+def onda_audio(frecuencia, amplitud, duracion, es_compleja=False, sample_rate=SAMPLE_RATE, out=None, dtype=np.float32, timbre=None):
+    """Onda lista para reproducir: `duracion` segundos a `sample_rate`."""
+    n = muestras_audio(duracion, sample_rate)
+    if out is not None:
+        out = out[:n]
+    with tramo("sintesis"):
+        return generar_onda(frecuencia, amplitud, n, 1 / sample_rate, es_compleja, out=out, dtype=dtype, timbre=timbre)
+
+
+def ondas_lote(frecuencias, amplitudes, duracion, sample_rate=SAMPLE_RATE):
+    """
+    Varios tonos puros de la misma duración en una sola pasada vectorizada.
+
+    Devuelve un array float32 (n_tonos, n_muestras), una fila por tono, con las
+    mismas muestras que daría `onda_audio` para cada uno por separado.
+    """
+    n = muestras_audio(duracion, sample_rate)
+    paso = 1 / sample_rate
+    with tramo("sintesis"), _buffers_trabajo(n) as (rampa, *_):
+        ciclos = np.multiply.outer(np.asarray(frecuencias, dtype=np.float64) * paso, rampa)
+        ciclos -= np.rint(ciclos)
+        ondas = np.multiply(ciclos, DOS_PI, dtype=np.float32)
+        del ciclos
+        np.sin(ondas, out=ondas)
+        ondas *= np.asarray(amplitudes, dtype=np.float32)[:, None]
+    return ondas
+
+
+# --- Varias voces a la vez (acordes, batidos, interferencias) ---
+# Una voz es una tupla (frecuencia en Hz, amplitud, fase inicial en grados).
+#
+# Con sin(A + B) = sin A · cos B + cos A · sin B, la muestra j de un bloque que
+# empieza con fase A_v es sin A_v · cos(2π k_v j) + cos A_v · sin(2π k_v j).
+# La tabla de cosenos y senos (2 · voces × ancho de bloque) no depende de dónde
+# empieza el bloque: se calcula una vez y cada bloque de la mezcla es un único
+# producto matriz-vector (los coeficientes de las voces por la tabla).
+
+def parametros_voces(voces):
+    """
+    (frecuencias, amplitudes, fases en ciclos) como arrays de una dimensión.
+
+    Si la suma de las amplitudes pasa de 1, todas se escalan por igual para que
+    la mezcla nunca sature; las proporciones entre voces se conservan.
+    """
+    voces = np.asarray(voces, dtype=np.float64).reshape(-1, 3)
+    frecuencias, amplitudes, fases = voces[:, 0].copy(), voces[:, 1].copy(), voces[:, 2] / 360
+    total = np.abs(amplitudes).sum()
+    if total > 1:
+        amplitudes /= total
+    return frecuencias, amplitudes, fases
+
+
+def tabla_voces(incrementos, ancho, out=None):
+    """
+    Tabla float32 (2 · voces, ancho): cos(2π k_v j) en las primeras filas y
+    sin(2π k_v j) en las siguientes, con `incrementos` k_v en ciclos por muestra.
+    """
+    n_voces = incrementos.size
+    if out is None:
+        out = np.empty((2 * n_voces, ancho), dtype=np.float32)
+    ciclos = np.multiply.outer(incrementos, np.arange(ancho, dtype=np.float64))
+    ciclos -= np.rint(ciclos)
+    ciclos *= DOS_PI
+    np.cos(ciclos, out=out[:n_voces], casting="same_kind")
+    np.sin(ciclos, out=out[n_voces:], casting="same_kind")
+    return out
+
+
+def coeficientes_voces(fases, amplitudes, out, aux):
+    """
+    Coeficientes de un bloque que empieza con `fases` (en ciclos): amplitud · sin A
+    y amplitud · cos A, en el orden de las filas de `tabla_voces`. `aux` es un
+    búfer float64 del tamaño de `fases`.
+    """
+    n_voces = fases.size
+    np.rint(fases, out=aux)
+    np.subtract(fases, aux, out=aux)
+    np.multiply(aux, DOS_PI, out=aux)
+    np.sin(aux, out=out[:n_voces], casting="same_kind")
+    np.cos(aux, out=out[n_voces:], casting="same_kind")
+    np.multiply(out[:n_voces], amplitudes, out=out[:n_voces], casting="same_kind")
+    np.multiply(out[n_voces:], amplitudes, out=out[n_voces:], casting="same_kind")
+    return out
+
+
+def bloques_voces(voces, n_muestras, paso, cortes=None, por_voz=False, out=None):
+    """
+    Recorre la mezcla de las `voces` por bloques de muestras.
+
+    Genera (inicio, fin, mezcla, matriz): `mezcla` es la suma de todas las
+    voces en esas muestras (una vista de `out` si se pasa) y `matriz`, con
+    `por_voz`, el array float32 (voces, fin - inicio) de cada voz por separado
+    (si no, None). Ambos viven en búferes reutilizados: solo son válidos
+    hasta el siguiente bloque. `cortes` son los límites de los bloques (por
+    defecto, unos ELEMENTOS_BLOQUE_VOCES valores de tabla por bloque);
+    `voces_para_grafico` los alinea con las columnas de píxeles.
+    """
+    frecuencias, amplitudes, fases = parametros_voces(voces)
+    n_voces = frecuencias.size
+    if n_voces == 0 or n_muestras == 0:
+        return
+    if cortes is None:
+        ancho = min(n_muestras, max(256, ELEMENTOS_BLOQUE_VOCES // n_voces))
+        cortes = np.append(np.arange(0, n_muestras, ancho), n_muestras)
+    cortes = np.asarray(cortes)
+    ancho = int(np.diff(cortes).max())
+
+    incrementos = frecuencias * paso
+    tabla = tabla_voces(incrementos, ancho)
+    coeficientes = np.empty(2 * n_voces, dtype=np.float32)
+    inicio_fases = np.empty(n_voces)
+    aux = np.empty(n_voces)
+    mezcla = np.empty(ancho, dtype=np.float32) if out is None else None
+    if por_voz:
+        matriz = np.empty((n_voces, ancho), dtype=np.float32)
+        producto = np.empty((n_voces, ancho), dtype=np.float32)
+
+    for inicio, fin in zip(cortes[:-1].tolist(), cortes[1:].tolist()):
+        m = fin - inicio
+        np.multiply(incrementos, inicio, out=inicio_fases)
+        np.add(inicio_fases, fases, out=inicio_fases)
+        coeficientes_voces(inicio_fases, amplitudes, coeficientes, aux)
+        destino = mezcla[:m] if out is None else out[inicio:fin]
+        # La suma ponderada de todas las voces: un solo producto (BLAS)
+        np.dot(coeficientes, tabla[:, :m], out=destino)
+        voces_bloque = None
+        if por_voz:
+            voces_bloque, otra = matriz[:, :m], producto[:, :m]
+            np.multiply(tabla[:n_voces, :m], coeficientes[:n_voces, None], out=voces_bloque)
+            np.multiply(tabla[n_voces:, :m], coeficientes[n_voces:, None], out=otra)
+            np.add(voces_bloque, otra, out=voces_bloque)
+        yield inicio, fin, destino, voces_bloque
+
+
+def suma_voces(voces, n_muestras, paso, out=None):
+    """
+    Mezcla de todas las `voces` (float32), escrita directamente en `out`.
+
+    El coste es el de la tabla (voces · ancho de bloque) más un producto
+    matriz-vector por bloque; no hay bucles de Python por voz.
+    """
+    if out is None:
+        out = np.empty(n_muestras, dtype=np.float32)
+    out[:n_muestras] = 0 # sin voces, silencio
+    for _ in bloques_voces(voces, n_muestras, paso, out=out):
+        pass
+    return out
+
+
+def onda_voces(voces, duracion, sample_rate=SAMPLE_RATE, out=None):
+    """Mezcla de las voces lista para reproducir: `duracion` segundos a `sample_rate`."""
+    n = muestras_audio(duracion, sample_rate)
+    if out is not None:
+        out = out[:n]
+    with tramo("sintesis"):
+        return suma_voces(voces, n, 1 / sample_rate, out=out)
+
+
+def _pico_armonico(puntos=1 << 16):
+    """Pico de sin(x) + sin(2x)/3, para normalizar sin tener el clip completo."""
+    x = np.linspace(0, DOS_PI, puntos, endpoint=False)
+    return float(np.max(np.abs(np.sin(x) + np.sin(2 * x) / 3)))
+
+
+PICO_ARMONICO = _pico_armonico()
+
+
+class Oscilador:
+    """
+    Oscilador por bloques con fase continua, pensado para callbacks de audio.
+
+    Cada llamada a `llenar` continúa la fase donde terminó la anterior, así que
+    los cambios de frecuencia no producen saltos. Los cambios de amplitud se
+    aplican con una rampa lineal a lo largo del bloque. Tras el primer bloque
+    no asigna memoria (mientras no crezca el tamaño de bloque).
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, bloque=256):
+        self.sample_rate = sample_rate
+        self.fase = 0.0 # en ciclos, [0, 1)
+        self.amplitud = 0.0
+        self._reservar(bloque)
+
+    def _reservar(self, n):
+        self._rampa = np.arange(n, dtype=np.float64)
+        self._ciclos = np.empty(n, dtype=np.float64)
+        self._vueltas = np.empty(n, dtype=np.float64)
+        self._onda = np.empty(n, dtype=np.float32)
+        self._aux = np.empty(n, dtype=np.float32)
+        self._indices = np.empty(n, dtype=np.intp)
+
+    def llenar(self, out, frecuencia, amplitud, es_compleja=False, timbre=None):
+        """Escribe en `out` el siguiente bloque y avanza la fase."""
+        n = out.shape[0]
+        if n > self._rampa.size:
+            self._reservar(n)
+        rampa, ciclos, vueltas = self._rampa[:n], self._ciclos[:n], self._vueltas[:n]
+        onda, aux = self._onda[:n], self._aux[:n]
+        timbre = resolver(timbre)
+
+        if amplitud == 0 and self.amplitud == 0:
+            out.fill(0)
+        else:
+            incremento = frecuencia / self.sample_rate
+            np.multiply(rampa, incremento, out=ciclos)
+            np.add(ciclos, self.fase, out=ciclos)
+            if timbre is not None:
+                tabla, pendientes = tabla_onda(timbre, armonicos_audibles(frecuencia, self.sample_rate))
+                leer_tabla(tabla, pendientes, ciclos, vueltas, self._indices[:n], onda, aux)
+            else:
+                np.rint(ciclos, out=vueltas)
+                np.subtract(ciclos, vueltas, out=ciclos)
+                np.multiply(ciclos, DOS_PI, out=onda, casting="same_kind")
+
+            pico = 1.0
+            if timbre is not None:
+                pass # la tabla ya está normalizada a pico 1
+            elif es_compleja:
+                np.multiply(onda, 2.0, out=aux)
+                np.sin(aux, out=aux)
+                np.sin(onda, out=onda)
+                np.multiply(aux, 1 / 3, out=aux)
+                np.add(onda, aux, out=onda)
+                pico = PICO_ARMONICO
+            else:
+                np.sin(onda, out=onda)
+
+            if amplitud == self.amplitud:
+                np.multiply(onda, amplitud / pico, out=onda)
+            else:
+                # Rampa de ganancia desde la amplitud anterior: sin chasquidos
+                np.multiply(rampa, (amplitud - self.amplitud) / (n * pico), out=aux, casting="same_kind")
+                np.add(aux, self.amplitud / pico, out=aux)
+                np.multiply(onda, aux, out=onda)
+            np.copyto(out, onda, casting="same_kind")
+
+        self.fase = (self.fase + n * frecuencia / self.sample_rate) % 1.0
+        self.amplitud = amplitud
+        return out
+
+
+class OsciladorVoces:
+    """
+    Como `Oscilador`, pero para varias voces sumadas, cada una con su fase continua.
+
+    Cada bloque es un producto de los coeficientes de las voces por la tabla de
+    `tabla_voces`, que solo se recalcula al cambiar las frecuencias. Los
+    cambios de amplitud se aplican con una rampa a lo largo del bloque. Si
+    cambia la fase de una voz, se desplaza solo esa voz. Si cambia el número
+    de voces, las fases vuelven a las iniciales. Mientras no cambien las
+    frecuencias, el número de voces ni el tamaño de bloque, no asigna memoria.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, bloque=256):
+        self.sample_rate = sample_rate
+        self.bloque = bloque
+        self._preparar(0)
+
+    def _preparar(self, n_voces):
+        self.fase = np.zeros(n_voces) # en ciclos, [0, 1)
+        self.fase_inicial = np.zeros(n_voces) # la que pidió el usuario
+        self.amplitud = np.zeros(n_voces) # partimos de silencio
+        self._incrementos = np.empty(n_voces)
+        self._coeficientes = np.empty(2 * n_voces, dtype=np.float32)
+        self._aux = np.empty(n_voces)
+        self._delta = np.empty(n_voces)
+        self._reservar(self.bloque)
+
+    def _reservar(self, n):
+        """Búferes para bloques de hasta `n` muestras; las fases se conservan."""
+        self.bloque = n
+        self.frecuencias = np.full(self.fase.size, np.nan) # fuerza el cálculo de la tabla
+        self._tabla = np.empty((2 * self.fase.size, n), dtype=np.float32)
+        self._rampa = np.arange(n, dtype=np.float32) / n
+        self._mezcla = np.empty(n, dtype=np.float32)
+        self._cambio = np.empty(n, dtype=np.float32)
+        self._ultimos = (None, None, None)
+
+    def llenar(self, out, frecuencias, amplitudes, fases):
+        """
+        Escribe en `out` el siguiente bloque de la mezcla y avanza las fases.
+
+        `frecuencias`, `amplitudes` y `fases` son los arrays de `parametros_voces`;
+        mientras sean los mismos objetos no se vuelven a comparar valor a valor.
+        """
+        n, n_voces = out.shape[0], frecuencias.size
+        if n_voces != self.fase.size:
+            self._preparar(n_voces)
+            np.copyto(self.fase, fases)
+            np.copyto(self.fase_inicial, fases)
+        if n > self.bloque:
+            self._reservar(n)
+        if n_voces == 0:
+            out.fill(0)
+            return out
+        nuevos = any(a is not b for a, b in zip((frecuencias, amplitudes, fases), self._ultimos))
+        self._ultimos = (frecuencias, amplitudes, fases)
+        if nuevos and not np.array_equal(frecuencias, self.frecuencias):
+            np.copyto(self.frecuencias, frecuencias)
+            np.divide(frecuencias, self.sample_rate, out=self._incrementos)
+            tabla_voces(self._incrementos, self.bloque, out=self._tabla)
+        if nuevos and not np.array_equal(fases, self.fase_inicial):
+            # Solo se desplazan las voces cuya fase ha cambiado
+            np.subtract(fases, self.fase_inicial, out=self._delta)
+            np.add(self.fase, self._delta, out=self.fase)
+            np.copyto(self.fase_inicial, fases)
+
+        tabla, mezcla, cambio = self._tabla[:, :n], self._mezcla[:n], self._cambio[:n]
+        coeficientes_voces(self.fase, self.amplitud, self._coeficientes, self._aux)
+        np.dot(self._coeficientes, tabla, out=mezcla)
+        if nuevos and not np.array_equal(amplitudes, self.amplitud):
+            # Rampa de ganancia desde las amplitudes anteriores: sin chasquidos.
+            # La mezcla es lineal en las amplitudes, así que basta con un segundo
+            # producto con las diferencias, multiplicado por la rampa.
+            np.subtract(amplitudes, self.amplitud, out=self._delta)
+            coeficientes_voces(self.fase, self._delta, self._coeficientes, self._aux)
+            np.dot(self._coeficientes, tabla, out=cambio)
+            rampa = self._rampa if n == self.bloque else np.arange(n, dtype=np.float32) / n
+            np.multiply(cambio, rampa, out=cambio)
+            np.add(mezcla, cambio, out=mezcla)
+            np.copyto(self.amplitud, amplitudes)
+        np.copyto(out, mezcla, casting="same_kind")
+
+        np.multiply(self._incrementos, n, out=self._delta)
+        np.add(self.fase, self._delta, out=self.fase)
+        np.remainder(self.fase, 1.0, out=self.fase)
+        return out
@@ -0,0 +1,102 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+# --- Configuración de las tablas de onda ---
+TAMANO_TABLA = 4096 # muestras por periodo
+MAX_ARMONICOS = 64
+
+
+class Timbre(NamedTuple):
+    """Espectro de un timbre: amplitud relativa y fase (rad) de cada armónico 1, 2, 3..."""
+    amplitudes: tuple
+    fases: tuple = ()
+
+
+def _serie(funcion_amplitud, funcion_fase=lambda k: 0.0, n=MAX_ARMONICOS):
+    return Timbre(tuple(funcion_amplitud(k) for k in range(1, n + 1)),
+                  tuple(funcion_fase(k) for k in range(1, n + 1)))
+
+
+# --- Timbres predefinidos (el primero es el tono puro) ---
+TIMBRES = {
+    "Pura": Timbre((1.0,)),
+    "Con armónico (2×)": Timbre((1.0, 1 / 3)), # El "Añadir armónico" de siempre
+    "Cuadrada": _serie(lambda k: 1 / k if k % 2 else 0.0),
+    "Diente de sierra": _serie(lambda k: 1 / k, lambda k: 0.0 if k % 2 else np.pi),
+    "Triangular": _serie(lambda k: 1 / k**2 if k % 2 else 0.0, lambda k: np.pi if (k // 2) % 2 else 0.0),
+    "Clarinete": Timbre((1.0, 0.0, 0.75, 0.0, 0.5, 0.0, 0.14, 0.0, 0.5, 0.0, 0.12, 0.0, 0.17)),
+    "Flauta": Timbre((1.0, 0.65, 0.61, 0.15, 0.09, 0.02, 0.02, 0.01, 0.01, 0.01)),
+    "Violín": Timbre((1.0, 0.9, 0.65, 0.55, 0.35, 0.3, 0.25, 0.2, 0.15, 0.12, 0.1, 0.08)),
+    "Trompeta": Timbre((1.0, 0.95, 0.8, 0.6, 0.5, 0.35, 0.25, 0.15, 0.1, 0.08, 0.05, 0.03)),
+}
+TIMBRE_PURO = "Pura"
+
+
+def resolver(timbre):
+    """Convierte un nombre de TIMBRES en su Timbre; None o "Pura" significan seno puro."""
+    if timbre is None or timbre == TIMBRE_PURO:
+        return None
+    if isinstance(timbre, str):
+        return TIMBRES[timbre]
+    return timbre
+
+
+def armonicos_audibles(frecuencia, sample_rate):
+    """Cuántos armónicos caben por debajo de Nyquist: los demás producirían aliasing."""
+    if frecuencia <= 0:
+        return MAX_ARMONICOS
+    return max(1, min(MAX_ARMONICOS, int(sample_rate / 2 // frecuencia)))
+
+
+@lru_cache(maxsize=256)
+def tabla_onda(timbre, n_armonicos=MAX_ARMONICOS):
+    """
+    Un periodo del timbre con sus primeros `n_armonicos`, normalizado a pico 1.
+
+    Se calcula de una vez con una rFFT inversa del espectro. Devuelve
+    (tabla, pendientes): `tabla` tiene TAMANO_TABLA + 1 muestras (la última repite
+    la primera) y `pendientes` la diferencia entre muestras consecutivas, para
+    interpolar linealmente sin calcularla en cada lectura.
+    """
+    amplitudes = np.asarray(timbre.amplitudes[:n_armonicos], dtype=np.float64)
+    fases = np.zeros(amplitudes.size)
+    fases[:len(timbre.fases[:n_armonicos])] = timbre.fases[:n_armonicos]
+
+    espectro = np.zeros(TAMANO_TABLA // 2 + 1, dtype=np.complex128)
+    # sin(kx + φ) = cos(kx + φ - π/2); irfft divide entre N y suma el conjugado
+    espectro[1:amplitudes.size + 1] = (TAMANO_TABLA / 2) * amplitudes * np.exp(1j * (fases - np.pi / 2))
+    periodo = np.fft.irfft(espectro, TAMANO_TABLA)
+
+    pico = np.max(np.abs(periodo))
+    if pico > 0:
+        periodo /= pico
+    tabla = np.empty(TAMANO_TABLA + 1, dtype=np.float32)
+    tabla[:-1] = periodo
+    tabla[-1] = periodo[0]
+    pendientes = np.diff(tabla)
+    tabla.flags.writeable = False
+    pendientes.flags.writeable = False
+    return tabla, pendientes
+
+
+def leer_tabla(tabla, pendientes, ciclos, vueltas, indices, out, aux):
+    """
+    Lee la tabla en las fases `ciclos` (en ciclos, cualquier valor real) con interpolación lineal.
+
+    Solo usa los búferes que recibe: `vueltas` (float64), `indices` (intp) y `aux`
+    (float32), todos del tamaño de `ciclos`. Destruye el contenido de `ciclos`.
+    """
+    np.floor(ciclos, out=vueltas)
+    np.subtract(ciclos, vueltas, out=ciclos) # [0, 1)
+    np.multiply(ciclos, TAMANO_TABLA, out=ciclos)
+    np.floor(ciclos, out=vueltas)
+    np.subtract(ciclos, vueltas, out=ciclos) # fracción entre dos muestras de la tabla
+    np.copyto(indices, vueltas, casting="unsafe")
+    np.minimum(indices, TAMANO_TABLA - 1, out=indices) # por redondeo de ciclos muy cercanos a 1
+    np.take(tabla, indices, out=out)
+    np.take(pendientes, indices, out=aux)
+    np.multiply(aux, ciclos, out=aux, casting="same_kind")
+    np.add(out, aux, out=out)
+    return out